@@ -0,0 +1,421 @@
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import itertools
+import importlib.util
+import importlib.machinery
+import multiprocessing as mp
+import concurrent.futures as cf
+from unittest import TestCase
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+main_columns = ['name', 'description', 'key_skills', 'salary_from', 'salary_to', 'salary_currency', 'area_name',
+                'published_at']
+hh_columns = ['', 'name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
+
+
+class VacancyGenerator:
+    """Класс создает воспроизводимые csv-файлы с вакансиями: одинаковые параметры и seed дают одинаковый файл.
+    Города выбираются по закону Ципфа (первые города встречаются намного чаще), валюты - по заданным долям,
+    часть описаний содержит html-разметку и переносы строк.
+
+    Attributes:
+        seed (int): Начальное значение генератора случайных чисел.
+        currencies (dict): Словарь валюта - доля вакансий.
+        city_skew (float): Показатель закона Ципфа для городов, 0 - города равновероятны.
+        html (float): Доля вакансий с html-разметкой в описании и названии.
+        empty (float): Доля вакансий с одним пустым полем.
+    """
+    names = ['Программист Python', 'Аналитик данных', 'Менеджер проектов', 'Java-разработчик', 'Тестировщик',
+             'Инженер-программист', 'Системный администратор', 'Frontend-разработчик', 'Бухгалтер', 'Юрист']
+    cities = ['Москва', 'Санкт-Петербург', 'Екатеринбург', 'Новосибирск', 'Казань', 'Нижний Новгород', 'Минск',
+              'Краснодар', 'Самара', 'Ростов-на-Дону', 'Уфа', 'Пермь', 'Алматы', 'Воронеж', 'Омск', 'Тюмень',
+              'Челябинск', 'Красноярск', 'Владивосток', 'Ярославль'] + [f'Город {i}' for i in range(80)]
+    skills = ['Python', 'SQL', 'Git', 'Linux', 'Docker', 'Excel', '1С', 'JavaScript', 'Java', 'Английский язык']
+
+    def __init__(self, seed=1, currencies=None, city_skew=1.1, html=0.3, empty=0.02):
+        """Инициализирует генератор.
+
+        Args:
+            seed (int): Начальное значение генератора случайных чисел.
+            currencies (dict or None): Словарь валюта - доля вакансий. None - 90% рублей.
+            city_skew (float): Показатель закона Ципфа для городов.
+            html (float): Доля вакансий с html-разметкой.
+            empty (float): Доля вакансий с одним пустым полем.
+        """
+        self.seed = seed
+        self.currencies = currencies or {'RUR': 0.9, 'USD': 0.04, 'EUR': 0.02, 'KZT': 0.02, 'UAH': 0.01,
+                                         'BYR': 0.01}
+        self.city_skew = city_skew
+        self.html = html
+        self.empty = empty
+
+    def rows(self, count, schema='main'):
+        """Функция перечисляет строки вакансий, не храня их в памяти.
+
+        Args:
+            count (int): Количество вакансий.
+            schema (str): main - столбцы main.py, hh - столбцы hh_vacancies.csv (названия в нем уже очищены
+                от html-разметки, поэтому генерируются без нее).
+
+        Returns:
+            generator: Строки csv-файла без заголовка.
+        """
+        r = random.Random(self.seed)
+        currencies = list(self.currencies)
+        currency_weights = list(itertools.accumulate(self.currencies.values()))
+        city_weights = list(itertools.accumulate(1 / (i + 1) ** self.city_skew for i in range(len(self.cities))))
+        for i in range(count):
+            name = r.choice(self.names)
+            html = r.random() < self.html
+            salary_from = r.randint(10, 300) * 1000
+            row = [f'<b>{name}</b>' if html else name,
+                   ('<p><strong>Обязанности:</strong></p>\n<ul><li>Разработка  и  поддержка</li>'
+                    '<li>Работа с "заказчиком"</li></ul>') if html else 'Разработка и поддержка сервисов',
+                   '\n'.join(r.sample(self.skills, 3)),
+                   str(float(salary_from)), str(float(salary_from + r.randint(0, 100) * 1000)),
+                   r.choices(currencies, cum_weights=currency_weights)[0],
+                   r.choices(self.cities, cum_weights=city_weights)[0],
+                   f'{r.randint(2003, 2022)}-{r.randint(1, 12):02}-{r.randint(1, 28):02}T{r.randint(0, 23):02}:'
+                   f'{r.randint(0, 59):02}:{r.randint(0, 59):02}+0300']
+            if r.random() < self.empty:
+                row[r.randrange(len(row))] = ''
+            yield row if schema == 'main' else [i, name if row[0] else ''] + row[3:]
+
+    def write(self, file_name, count, schema='main'):
+        """Функция записывает csv-файл с вакансиями.
+
+        Args:
+            file_name (str): Название csv-файла.
+            count (int): Количество вакансий.
+            schema (str): main или hh.
+
+        Returns:
+            str: Название csv-файла.
+        """
+        with open(file_name, 'w', encoding='utf_8_sig', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(main_columns if schema == 'main' else hh_columns)
+            writer.writerows(self.rows(count, schema))
+        return file_name
+
+
+def year_statistic(task):
+    """Функция считает статистику одного раздела функцией statistic из задания 3.2.2. Файл задания загружается
+    по пути, потому что его название нельзя импортировать, и загружается один раз в каждом процессе.
+
+    Args:
+        task (dict): Задача с ключами file, year и vacancy_names.
+
+    Returns:
+        tuple: Результат функции statistic.
+    """
+    module = sys.modules.get('year_statistic_task')
+    if module is None:
+        file_name = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Задание 3.2.2 , 3.2.3')
+        spec = importlib.util.spec_from_loader('year_statistic_task',
+                                               importlib.machinery.SourceFileLoader('year_statistic_task', file_name))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules['year_statistic_task'] = module
+    return module.statistic(task)
+
+
+class Stages:
+    """Класс содержит этапы обработки для замеров. Каждый этап сначала готовит данные, а затем замеряет только
+    свою часть работы, и возвращает количество обработанных строк и время в секундах.
+    """
+    @staticmethod
+    def row_chunks(file_name, size=10000):
+        """Функция построчно читает csv-файл через csv.reader и отдает строки частями, поэтому в памяти
+        находится не больше size строк, как при чтении DataSet.csv_stream.
+
+        Args:
+            file_name (str): Название csv-файла.
+            size (int): Количество строк в одной части.
+
+        Yields:
+            tuple: Название столбцов и список строк части.
+        """
+        from compressed import open_file
+        with open_file(file_name, encoding='utf_8_sig') as file:
+            reader = csv.reader(file)
+            list_naming = next(reader)
+            for chunk in iter(lambda: list(itertools.islice(reader, size)), []):
+                yield list_naming, chunk
+
+    @staticmethod
+    def csv_reader(files, workers):
+        """Построчное чтение csv-файла через csv.reader, как в DataSet.csv_stream."""
+        from compressed import open_file
+        start = time.perf_counter()
+        with open_file(files['main'], encoding='utf_8_sig') as file:
+            rows = sum(1 for _ in csv.reader(file)) - 1
+        return rows, time.perf_counter() - start
+
+    @staticmethod
+    def cleaner_string(files, workers):
+        """Очистка всех полей от html-тегов и лишних пробелов, замеряется только очистка каждой части."""
+        from main import DataSet
+        rows, elapsed = 0, 0.0
+        for _, chunk in Stages.row_chunks(files['main']):
+            start = time.perf_counter()
+            for row in chunk:
+                for value in row:
+                    DataSet.cleaner_string(value)
+            elapsed += time.perf_counter() - start
+            rows += len(chunk)
+        return rows, elapsed
+
+    @staticmethod
+    def salary(files, workers):
+        """Создание объектов Salary для вакансий с полной вилкой, замеряется только создание объектов."""
+        from main import Salary, currency_to_rub
+        rows, elapsed = 0, 0.0
+        for list_naming, chunk in Stages.row_chunks(files['main']):
+            i, j, k = (list_naming.index(column) for column in ('salary_from', 'salary_to', 'salary_currency'))
+            chunk = [(row[i], row[j], row[k]) for row in chunk if row[i] and row[j] and row[k] in currency_to_rub]
+            start = time.perf_counter()
+            for salary_from, salary_to, salary_currency in chunk:
+                Salary(salary_from, salary_to, salary_currency)
+            elapsed += time.perf_counter() - start
+            rows += len(chunk)
+        return rows, elapsed
+
+    @staticmethod
+    def printing_data(files, workers):
+        """Подсчет шести словарей статистики за один проход, workers - количество процессов."""
+        from main import DataSet
+        start = time.perf_counter()
+        statistic = DataSet.get_statistic(files['main'], 'Программист', workers)
+        statistic.get_dicts()
+        return statistic.count, time.perf_counter() - start
+
+    @staticmethod
+    def pandas_split(files, workers):
+        """Разделение файла по годам через YearPartitioner."""
+        from partitioner import YearPartitioner
+        with tempfile.TemporaryDirectory() as folder:
+            start = time.perf_counter()
+            manifest = YearPartitioner(folder, file_format='csv').partition(files['main'])
+            elapsed = time.perf_counter() - start
+        return sum(info['rows'] for info in manifest['years'].values()), elapsed
+
+    @staticmethod
+    def year_statistic(files, workers, backend):
+        """Подсчет статистики по годам из задания 3.2.2 через PartitionScheduler. Разделы по годам готовятся
+        заранее, замеряется обработка разделов вместе с запуском пула процессов.
+
+        Args:
+            files (dict): Файлы по схемам.
+            workers (int): Количество процессов.
+            backend (str): Способ обработки: serial, pool или futures.
+
+        Returns:
+            tuple: Количество строк и время в секундах.
+        """
+        from partitioner import YearPartitioner, PartitionScheduler
+        with tempfile.TemporaryDirectory() as folder:
+            manifest = YearPartitioner(folder, file_format='csv').partition(files['main'])
+            tasks = [{'file': os.path.join(folder, info['file']), 'year': int(year),
+                      'vacancy_names': ['Программист', 'Аналитик']} for year, info in manifest['years'].items()]
+            results = []
+            start = time.perf_counter()
+            with PartitionScheduler(backend, workers) as scheduler:
+                scheduler.run(year_statistic, tasks, results.append)
+            elapsed = time.perf_counter() - start
+        return sum(info['rows'] for info in manifest['years'].values()), elapsed
+
+    @staticmethod
+    def statistic_serial(files, workers):
+        """Статистика по годам в одном процессе."""
+        return Stages.year_statistic(files, workers, 'serial')
+
+    @staticmethod
+    def statistic_pool(files, workers):
+        """Статистика по годам в multiprocessing.Pool, workers - количество процессов."""
+        return Stages.year_statistic(files, workers, 'pool')
+
+    @staticmethod
+    def statistic_futures(files, workers):
+        """Статистика по годам в concurrent.futures.ProcessPoolExecutor, workers - количество процессов."""
+        return Stages.year_statistic(files, workers, 'futures')
+
+    @staticmethod
+    def currency_conversion(files, workers):
+        """Перевод зарплат hh-схемы в рубли через CurrencyRates.convert_salaries."""
+        import pandas as pd
+        from currency_rates import CurrencyRates
+        df = pd.read_csv(files['hh'])
+        months = CurrencyRates.month_range('2003-01', '2022-12')
+        currencies = ['USD', 'EUR', 'KZT', 'UAH', 'BYR']
+        currency_data = pd.DataFrame([[60.0 + i % 7, 70.0 + i % 5, 0.15, 2.5, 25.0] for i in range(len(months))],
+                                     index=pd.Index(months, name='date'), columns=currencies)
+        start = time.perf_counter()
+        CurrencyRates.convert_salaries(df, currency_data)
+        return len(df), time.perf_counter() - start
+
+    @staticmethod
+    def report(files, workers):
+        """Построение xlsx-отчета и графиков через Report.render (pdf не строится: нужен wkhtmltopdf)."""
+        from main import DataSet, Report
+        result = DataSet.get_statistic(files['main'], 'Программист').get_dicts()
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as folder:
+            os.chdir(folder)
+            try:
+                start = time.perf_counter()
+                Report.render(result, 'Программист', ('png', 'xlsx'))
+                elapsed = time.perf_counter() - start
+            finally:
+                os.chdir(cwd)
+        return len(result[0]), elapsed
+
+
+class Benchmark:
+    """Класс замеряет этапы обработки на сгенерированных файлах. Каждый этап запускается в отдельном новом
+    процессе, чтобы пиковая память (peak RSS) относилась только к нему.
+
+    Attributes:
+        files (dict): Сгенерированные файлы по схемам: main и hh.
+        rows (int): Количество вакансий в файлах.
+    """
+    stages = ('csv_reader', 'cleaner_string', 'salary', 'printing_data', 'pandas_split', 'statistic_serial',
+              'statistic_pool', 'statistic_futures', 'currency_conversion', 'report')
+    parallel_stages = ('printing_data', 'statistic_pool', 'statistic_futures')
+
+    def __init__(self, folder, rows, generator=None):
+        """Инициализирует замеры и создает файлы, если их еще нет.
+
+        Args:
+            folder (str): Папка для сгенерированных файлов.
+            rows (int): Количество вакансий.
+            generator (VacancyGenerator or None): Генератор вакансий. None - параметры по умолчанию.
+        """
+        generator = generator or VacancyGenerator()
+        self.rows = rows
+        self.files = {}
+        os.makedirs(folder, exist_ok=True)
+        for schema in ('main', 'hh'):
+            file_name = os.path.join(folder, f'vacancies_{schema}_{rows}_{generator.seed}.csv')
+            if not os.path.exists(file_name):
+                generator.write(file_name, rows, schema)
+            self.files[schema] = file_name
+
+    @staticmethod
+    def run_stage(stage, files, workers):
+        """Функция выполняет один этап и возвращает замеры.
+
+        Args:
+            stage (str): Название этапа из Benchmark.stages.
+            files (dict): Файлы по схемам.
+            workers (int): Количество процессов.
+
+        Returns:
+            tuple: Количество строк, время в секундах и пиковая память процесса (или его дочернего процесса)
+                в килобайтах.
+        """
+        rows, seconds = getattr(Stages, stage)(files, workers)
+        peak_rss = None
+        if resource is not None:
+            peak_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                           resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+            if sys.platform == 'darwin':
+                peak_rss //= 1024
+        return rows, seconds, peak_rss
+
+    def run(self, stages=None, workers=(1,)):
+        """Функция замеряет этапы, параллельные этапы - для каждого количества процессов.
+
+        Args:
+            stages (list or None): Этапы. None - все.
+            workers (tuple): Количества процессов.
+
+        Returns:
+            list: Замеры: этап, процессы, строки, секунды, строк в секунду и пиковая память.
+        """
+        results = []
+        for stage in stages or Benchmark.stages:
+            for count in (workers if stage in Benchmark.parallel_stages else (1,)):
+                with cf.ProcessPoolExecutor(1, mp_context=mp.get_context('spawn')) as executor:
+                    rows, seconds, peak_rss = executor.submit(Benchmark.run_stage, stage, self.files, count).result()
+                results.append({'stage': stage, 'workers': count, 'rows': rows, 'seconds': round(seconds, 4),
+                                'rows_per_sec': round(rows / seconds) if seconds else None,
+                                'peak_rss_kb': peak_rss})
+        return results
+
+    def report(self, results):
+        """Функция собирает замеры и сведения об окружении в словарь для json.
+
+        Args:
+            results (list): Замеры из run.
+
+        Returns:
+            dict: Отчет о замерах.
+        """
+        return {'rows': self.rows, 'files': {schema: os.path.getsize(file_name) for schema, file_name in
+                                             self.files.items()},
+                'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                                'cpus': os.cpu_count()},
+                'results': results}
+
+
+class Tests(TestCase):
+    def test_generator_is_reproducible(self):
+        generator = VacancyGenerator(seed=7, currencies={'USD': 1.0})
+        rows = list(generator.rows(50, 'hh'))
+        self.assertEqual(rows, list(VacancyGenerator(seed=7, currencies={'USD': 1.0}).rows(50, 'hh')))
+        self.assertEqual(rows[3][0], 3)
+        self.assertEqual({row[4] for row in rows} - {''}, {'USD'})
+        self.assertFalse([row[1] for row in rows if '<' in row[1]])
+
+    def test_stage_measurements(self):
+        with tempfile.TemporaryDirectory() as folder:
+            benchmark = Benchmark(folder, 200)
+            rows, seconds, peak_rss = Benchmark.run_stage('pandas_split', benchmark.files, 1)
+            self.assertGreater(rows, 180)
+            self.assertGreaterEqual(seconds, 0)
+            result = benchmark.run(['csv_reader'])[0]
+            self.assertEqual((result['stage'], result['rows']), ('csv_reader', 200))
+            self.assertEqual(Stages.cleaner_string(benchmark.files, 1)[0], 200)
+            self.assertGreater(Stages.report(benchmark.files, 1)[0], 0)
+            results = benchmark.run(['statistic_serial', 'statistic_pool', 'statistic_futures'], (1, 2))
+            self.assertEqual([(result['stage'], result['workers']) for result in results],
+                             [('statistic_serial', 1), ('statistic_pool', 1), ('statistic_pool', 2),
+                              ('statistic_futures', 1), ('statistic_futures', 2)])
+            self.assertEqual({result['rows'] for result in results}, {rows})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Замеры скорости обработки вакансий')
+    parser.add_argument('--rows', type=int, default=10000, help='количество вакансий (от 10 тысяч до 100 миллионов)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--folder', default='benchmark_data', help='папка для сгенерированных файлов')
+    parser.add_argument('--stages', default=','.join(Benchmark.stages), help='этапы через запятую')
+    parser.add_argument('--workers', default='1,2,4', help='количества процессов через запятую')
+    parser.add_argument('--city-skew', type=float, default=1.1)
+    parser.add_argument('--html', type=float, default=0.3, help='доля вакансий с html-разметкой')
+    parser.add_argument('--currencies', default=None, help='доли валют, например RUR:0.8,USD:0.2')
+    parser.add_argument('--output', default=None, help='json-файл для результатов, по умолчанию - консоль')
+    args = parser.parse_args()
+    currencies = None
+    if args.currencies:
+        currencies = {currency: float(share) for currency, share in
+                      (item.split(':') for item in args.currencies.split(','))}
+    benchmark = Benchmark(args.folder, args.rows, VacancyGenerator(args.seed, currencies, args.city_skew, args.html))
+    report = benchmark.report(benchmark.run(args.stages.split(','), tuple(int(x) for x in args.workers.split(','))))
+    if args.output:
+        with open(args.output, 'w', encoding='utf_8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=1)
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=1))
@@ -0,0 +1,190 @@
+import io
+import os
+import bz2
+import gzip
+import lzma
+import queue
+import threading
+import tempfile
+from unittest import TestCase
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+codecs = ('.gz', '.bz2', '.xz', '.zst')
+
+
+def is_compressed(file_name):
+    """Функция проверяет по расширению, сжат ли файл.
+
+    Args:
+        file_name (str): Название файла.
+
+    Returns:
+        bool: True для .gz, .bz2, .xz и .zst.
+
+    >>> is_compressed('vacancies.csv.gz'), is_compressed('vacancies.csv')
+    (True, False)
+    """
+    return os.path.splitext(file_name)[1] in codecs
+
+
+def open_codec(file_name, mode):
+    """Функция открывает сжатый файл в двоичном режиме кодеком по расширению.
+
+    Args:
+        file_name (str): Название файла с расширением .gz, .bz2, .xz или .zst.
+        mode (str): rb, wb или ab.
+
+    Returns:
+        file: Двоичный файловый объект, который сжимает или распаковывает данные.
+    """
+    extension = os.path.splitext(file_name)[1]
+    if extension == '.gz':
+        return gzip.open(file_name, mode)
+    if extension == '.bz2':
+        return bz2.open(file_name, mode)
+    if extension == '.xz':
+        return lzma.open(file_name, mode)
+    if zstandard is None:
+        raise ImportError('Для файлов .zst нужен пакет zstandard')
+    return zstandard.open(file_name, mode)
+
+
+class ThreadedReader(io.RawIOBase):
+    """Класс распаковывает файл в отдельном потоке. Поток читает блоки по buffer_size байт и кладет их
+    в очередь не больше чем из queue_size блоков, а разбор csv забирает их из очереди, поэтому распаковка
+    идет одновременно с разбором, а память ограничена очередью.
+
+    Attributes:
+        source (file): Двоичный файловый объект кодека.
+        blocks (Queue): Очередь распакованных блоков, пустой блок - конец файла.
+    """
+    def __init__(self, source, buffer_size=1 << 20, queue_size=8):
+        """Инициализирует чтение и запускает поток распаковки.
+
+        Args:
+            source (file): Двоичный файловый объект кодека.
+            buffer_size (int): Размер одного блока в байтах.
+            queue_size (int): Наибольшее количество блоков в очереди.
+        """
+        super().__init__()
+        self.source = source
+        self.buffer_size = buffer_size
+        self.blocks = queue.Queue(queue_size)
+        self.block = memoryview(b'')
+        self.stop = threading.Event()
+        self.finished = False
+        self.thread = threading.Thread(target=self.produce, daemon=True)
+        self.thread.start()
+
+    def produce(self):
+        """Функция потока: распаковывает файл по блокам, ошибка передается читателю через очередь."""
+        try:
+            while not self.stop.is_set():
+                block = self.source.read(self.buffer_size)
+                self.put(block)
+                if not block:
+                    return
+        except Exception as error:
+            self.put(error)
+
+    def put(self, item):
+        """Функция кладет блок в очередь, пока чтение не закрыто.
+
+        Args:
+            item (bytes or Exception): Блок или ошибка распаковки.
+        """
+        while not self.stop.is_set():
+            try:
+                self.blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        """Функция копирует в buffer следующую часть распакованных данных.
+
+        Args:
+            buffer (memoryview): Буфер для данных.
+
+        Returns:
+            int: Количество байтов, 0 - конец файла.
+        """
+        if not self.block:
+            if self.finished:
+                return 0
+            block = self.blocks.get()
+            if isinstance(block, Exception):
+                raise block
+            if not block:
+                self.finished = True
+                return 0
+            self.block = memoryview(block)
+        size = min(len(buffer), len(self.block))
+        buffer[:size] = self.block[:size]
+        self.block = self.block[size:]
+        return size
+
+    def close(self):
+        """Функция останавливает поток распаковки и закрывает файл."""
+        if not self.closed:
+            self.stop.set()
+            self.thread.join()
+            self.source.close()
+        super().close()
+
+
+def open_file(file_name, mode='r', encoding=None, newline=None, buffer_size=1 << 20, queue_size=8):
+    """Функция открывает обычный или сжатый (.gz, .bz2, .xz, .zst) файл. Сжатый файл читается через
+    ThreadedReader, запись и дозапись идут через кодек с тем же расширением.
+
+    Args:
+        file_name (str): Название файла.
+        mode (str): Режим как у open: r, rb, w, wb, a, ab.
+        encoding (str or None): Кодировка для текстового режима.
+        newline (str or None): Обработка переводов строк для текстового режима.
+        buffer_size (int): Размер блока распаковки в байтах.
+        queue_size (int): Наибольшее количество распакованных блоков в очереди.
+
+    Returns:
+        file: Файловый объект.
+    """
+    if not is_compressed(file_name):
+        return open(file_name, mode, encoding=encoding, newline=newline)
+    binary_mode = mode.replace('t', '').replace('b', '') + 'b'
+    if binary_mode == 'rb':
+        file = io.BufferedReader(ThreadedReader(open_codec(file_name, 'rb'), buffer_size, queue_size), buffer_size)
+    else:
+        file = open_codec(file_name, binary_mode)
+    if 'b' in mode:
+        return file
+    return io.TextIOWrapper(file, encoding=encoding, newline=newline)
+
+
+class Tests(TestCase):
+    def test_round_trip(self):
+        text = 'name,published_at\n' + 'Программист,"2022-01-01\nT00:00:00+0300"\n' * 5000
+        with tempfile.TemporaryDirectory() as folder:
+            for extension in ('', '.gz', '.bz2', '.xz'):
+                file_name = os.path.join(folder, 'vacancies.csv' + extension)
+                with open_file(file_name, 'w', encoding='utf_8_sig', newline='') as file:
+                    file.write(text[:1000])
+                with open_file(file_name, 'a', encoding='utf_8', newline='') as file:
+                    file.write(text[1000:])
+                with open_file(file_name, encoding='utf_8_sig', newline='', buffer_size=4096, queue_size=2) as file:
+                    self.assertEqual(file.read(), text)
+
+    def test_error_is_raised_in_reader(self):
+        with tempfile.TemporaryDirectory() as folder:
+            file_name = os.path.join(folder, 'broken.csv.gz')
+            with open(file_name, 'wb') as file:
+                file.write(b'not gzip')
+            with self.assertRaises(OSError):
+                with open_file(file_name, 'rb') as file:
+                    file.read()
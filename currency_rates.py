@@ -0,0 +1,273 @@
+import sqlite3
+import time
+import concurrent.futures as cf
+import xml.etree.ElementTree as ET
+from urllib.parse import urlparse, parse_qs
+from unittest import TestCase
+import tempfile
+import os
+import requests
+from profiler import profiler
+from stub_server import StubServer
+from requests.adapters import HTTPAdapter
+
+
+class CurrencyRates:
+    """Класс хранит курсы валют ЦБ РФ на первое число месяца в sqlite-файле с ключом (валюта, месяц).
+    Недостающие месяцы скачиваются параллельно через общий пул соединений, с повторами и растущей паузой.
+
+    Attributes:
+        db_name (str): Название sqlite-файла с курсами.
+        url (str): Адрес XML_daily.asp ЦБ РФ.
+        workers (int): Количество одновременных запросов.
+        retries (int): Количество попыток скачать один месяц.
+        backoff (float): Пауза перед второй попыткой в секундах, дальше удваивается.
+    """
+    aliases = {'BYN': 'BYR'}
+
+    def __init__(self, db_name='currency_rates.sqlite', url='http://www.cbr.ru/scripts/XML_daily.asp', workers=8,
+                 retries=5, backoff=0.5):
+        """Инициализирует хранилище и создает таблицы, если их еще нет.
+
+        Args:
+            db_name (str): Название sqlite-файла с курсами.
+            url (str): Адрес XML_daily.asp ЦБ РФ.
+            workers (int): Количество одновременных запросов.
+            retries (int): Количество попыток скачать один месяц.
+            backoff (float): Пауза перед второй попыткой в секундах, дальше удваивается.
+        """
+        self.db_name = db_name
+        self.url = url
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        with sqlite3.connect(self.db_name) as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS rates '
+                               '(currency TEXT, month TEXT, rate REAL, PRIMARY KEY (currency, month))')
+            connection.execute('CREATE TABLE IF NOT EXISTS months (month TEXT PRIMARY KEY)')
+
+    @staticmethod
+    def month_range(first, last):
+        """Функция перечисляет месяцы от first до last включительно.
+
+        Args:
+            first (str): Первый месяц в формате 'YYYY-MM'.
+            last (str): Последний месяц в формате 'YYYY-MM'.
+
+        Returns:
+            list: Месяцы в формате 'YYYY-MM'.
+
+        >>> CurrencyRates.month_range('2003-11', '2004-02')
+        ['2003-11', '2003-12', '2004-01', '2004-02']
+        """
+        year, month = int(first[:4]), int(first[5:7])
+        months = []
+        while f'{year}-{month:02}' <= last:
+            months.append(f'{year}-{month:02}')
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return months
+
+    @staticmethod
+    def parse_xml(content):
+        """Функция разбирает ответ XML_daily.asp в словарь курсов за одну единицу валюты.
+
+        Args:
+            content (bytes): Ответ ЦБ РФ.
+
+        Returns:
+            dict: Словарь валюта - курс в рублях.
+        """
+        rates = {}
+        for valute in ET.fromstring(content).iter('Valute'):
+            currency = valute.findtext('CharCode')
+            value = float(valute.findtext('Value').replace(',', '.')) / float(valute.findtext('Nominal'))
+            rates[CurrencyRates.aliases.get(currency, currency)] = value
+        return rates
+
+    def fetch_month(self, session, month):
+        """Функция скачивает курсы на первое число месяца, повторяя запрос при ошибках.
+
+        Args:
+            session (Session): Сессия requests с общим пулом соединений.
+            month (str): Месяц в формате 'YYYY-MM'.
+
+        Returns:
+            dict: Словарь валюта - курс в рублях.
+        """
+        params = {'date_req': f'01/{month[5:7]}/{month[:4]}', 'd': 0}
+        for attempt in range(self.retries):
+            try:
+                response = session.get(self.url, params=params, timeout=30)
+                response.raise_for_status()
+                return CurrencyRates.parse_xml(response.content)
+            except (requests.RequestException, ET.ParseError, ValueError):
+                if attempt == self.retries - 1:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def update(self, months):
+        """Функция скачивает только те месяцы, которых еще нет в хранилище. Каждый месяц сохраняется
+        в своей транзакции сразу после скачивания, поэтому ошибка одного месяца не отменяет остальные:
+        она передается вызывающему после того, как сохранены все скачанные месяцы.
+
+        Args:
+            months (list): Месяцы в формате 'YYYY-MM'.
+
+        Returns:
+            int: Количество скачанных месяцев.
+        """
+        with sqlite3.connect(self.db_name) as connection:
+            known = {row[0] for row in connection.execute('SELECT month FROM months')}
+        missing = [month for month in months if month not in known]
+        if not missing:
+            return 0
+        with requests.Session() as session:
+            session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=self.workers))
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=self.workers))
+            errors = []
+            connection = sqlite3.connect(self.db_name)
+            try:
+                with cf.ThreadPoolExecutor(self.workers) as executor:
+                    futures = {executor.submit(self.fetch_month, session, month): month for month in missing}
+                    for future in cf.as_completed(futures):
+                        month = futures[future]
+                        try:
+                            rates = future.result()
+                        except (requests.RequestException, ET.ParseError, ValueError) as error:
+                            errors.append(error)
+                            continue
+                        with connection:
+                            connection.executemany('INSERT OR REPLACE INTO rates VALUES (?, ?, ?)',
+                                                   [(currency, month, rate) for currency, rate in rates.items()])
+                            connection.execute('INSERT OR REPLACE INTO months VALUES (?)', (month,))
+            finally:
+                connection.close()
+        if errors:
+            raise errors[0]
+        return len(missing)
+
+    def get_table(self, first=None, last=None):
+        """Функция загружает курсы в память для быстрого поиска.
+
+        Args:
+            first (str or None): Первый месяц в формате 'YYYY-MM'. Если указан, недостающие месяцы скачиваются.
+            last (str or None): Последний месяц в формате 'YYYY-MM'.
+
+        Returns:
+            dict: Словарь месяц - {валюта: курс в рублях}, у рубля (RUR) курс всегда 1.
+        """
+        if first is not None:
+            self.update(CurrencyRates.month_range(first, last or first))
+        table = {}
+        with sqlite3.connect(self.db_name) as connection:
+            for currency, month, rate in connection.execute('SELECT currency, month, rate FROM rates'):
+                table.setdefault(month, {'RUR': 1})[currency] = rate
+        return table
+
+    def get_rates(self, month):
+        """Функция возвращает курсы за один месяц.
+
+        Args:
+            month (str): Месяц в формате 'YYYY-MM'.
+
+        Returns:
+            dict: Словарь валюта - курс в рублях.
+        """
+        return self.get_table(month, month)[month]
+
+    def get_frame(self, currencies, first, last):
+        """Функция возвращает курсы в виде таблицы pandas: строки - месяцы, столбцы - валюты.
+
+        Args:
+            currencies (list): Нужные валюты.
+            first (str): Первый месяц в формате 'YYYY-MM'.
+            last (str): Последний месяц в формате 'YYYY-MM'.
+
+        Returns:
+            DataFrame: Курсы валют по месяцам.
+        """
+        import pandas as pd
+        table = self.get_table(first, last)
+        months = CurrencyRates.month_range(first, last)
+        return pd.DataFrame([[table.get(month, {}).get(currency) for currency in currencies] for month in months],
+                            index=pd.Index(months, name='date'), columns=list(currencies), dtype='float64')
+
+    @staticmethod
+    def convert_salaries(df, currency_data):
+        """Функция переводит зарплаты в рубли по курсу месяца публикации без цикла по строкам: номера строк
+        и столбцов таблицы курсов находятся через get_indexer, а рубли и пустые зарплаты отсекаются масками.
+
+        Args:
+            df (DataFrame): Вакансии со столбцами salary_from, salary_to, salary_currency, published_at.
+            currency_data (DataFrame): Курсы валют: строки - месяцы 'YYYY-MM', столбцы - валюты.
+
+        Returns:
+            DataFrame: Вакансии со столбцом salary (в рублях) вместо salary_from, salary_to и salary_currency.
+        """
+        import numpy as np
+        with profiler.stage('currency_conversion'):
+            salary = df[['salary_from', 'salary_to']].mean(axis=1).to_numpy(dtype='float64', copy=True)
+            currency = df['salary_currency'].astype('object')
+            mask = ~np.isnan(salary) & currency.notna().to_numpy() & (currency != 'RUR').to_numpy()
+            month_ids = currency_data.index.get_indexer(df['published_at'].str[:7][mask])
+            currency_ids = currency_data.columns.get_indexer(currency[mask])
+            found = (month_ids >= 0) & (currency_ids >= 0)
+            rates = np.full(len(month_ids), np.nan)
+            rates[found] = currency_data.to_numpy(dtype='float64')[month_ids[found], currency_ids[found]]
+            salary[mask] = np.round(salary[mask] * rates)
+            df = df.drop(['salary_from', 'salary_to', 'salary_currency'], axis=1)
+            df.insert(1, 'salary', salary.astype('float32'))
+            profiler.count('currency_conversion', len(df), int(np.isnan(salary).sum()),
+                           int((~np.isnan(salary)).sum()))
+            return df
+
+
+class Tests(StubServer, TestCase):
+    xml = ('<?xml version="1.0" encoding="windows-1251"?><ValCurs Date="01.{month}.{year}" name="Foreign Currency '
+           'Market"><Valute ID="R01235"><NumCode>840</NumCode><CharCode>USD</CharCode><Nominal>1</Nominal>'
+           '<Name>Доллар США</Name><Value>{value},5000</Value></Valute><Valute ID="R01335"><NumCode>398</NumCode>'
+           '<CharCode>KZT</CharCode><Nominal>100</Nominal><Name>Тенге</Name><Value>20,0000</Value></Valute>'
+           '<Valute ID="R01090B"><NumCode>933</NumCode><CharCode>BYN</CharCode><Nominal>1</Nominal>'
+           '<Name>Белорусский рубль</Name><Value>25,0000</Value></Valute></ValCurs>')
+
+    def setUp(self):
+        requests_log = self.requests_log = []
+
+        def respond(handler):
+            day, month, year = parse_qs(urlparse(handler.path).query)['date_req'][0].split('/')
+            requests_log.append(f'{year}-{month}')
+            if len(requests_log) == 1 or year == '1999':
+                return StubServer.reply(handler, 503)
+            StubServer.reply(handler, 200, Tests.xml.format(month=month, year=year, value=int(month) + 30)
+                             .encode('windows-1251'), 'application/xml')
+
+        url = self.start_server(respond)
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.rates = CurrencyRates(os.path.join(self.folder.name, 'rates.sqlite'), f'{url}/XML_daily.asp', workers=4,
+                                   backoff=0.01)
+
+    def test_update_only_missing_months(self):
+        self.assertEqual(self.rates.update(CurrencyRates.month_range('2003-11', '2004-02')), 4)
+        self.assertEqual(self.rates.update(CurrencyRates.month_range('2003-12', '2004-03')), 1)
+        self.assertEqual(len(self.requests_log), 6)
+
+    def test_failed_month_keeps_others(self):
+        with self.assertRaises(requests.HTTPError):
+            self.rates.update(['1999-01', '2004-01', '2004-02'])
+        self.assertEqual(sorted(self.rates.get_table()), ['2004-01', '2004-02'])
+
+    def test_lookup_table(self):
+        table = self.rates.get_table('2004-01', '2004-02')
+        self.assertEqual(table['2004-02'], {'RUR': 1, 'USD': 32.5, 'KZT': 0.2, 'BYR': 25.0})
+        self.assertEqual(self.rates.get_frame(['USD'], '2004-01', '2004-02')['USD'].tolist(), [31.5, 32.5])
+
+    def test_convert_salaries(self):
+        import pandas as pd
+        currency_data = self.rates.get_frame(['USD', 'KZT'], '2004-01', '2004-02')
+        df = pd.DataFrame({'name': ['a', 'b', 'c', 'd'], 'salary_from': [100, 1000, None, 10],
+                           'salary_to': [300, None, None, 20], 'salary_currency': ['USD', 'RUR', None, 'KZT'],
+                           'area_name': ['Москва'] * 4, 'published_at': ['2004-02-10T10:00:00+0300'] * 4})
+        result = CurrencyRates.convert_salaries(df, currency_data)
+        self.assertEqual(list(result.columns), ['name', 'salary', 'area_name', 'published_at'])
+        self.assertEqual(result['salary'].fillna(-1).tolist(), [6500.0, 1000.0, -1, 3.0])
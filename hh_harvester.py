@@ -0,0 +1,523 @@
+import asyncio
+import csv
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse, parse_qs
+from unittest import TestCase
+import tempfile
+import os
+import aiohttp
+from compressed import open_file, is_compressed
+from stub_server import StubServer
+
+columns = ["name", "salary_from", "salary_to", "salary_currency", "area_name", "published_at"]
+
+
+class TokenBucket:
+    """Класс ограничивает частоту запросов: за секунду выдается не больше rate разрешений,
+    а накопить можно не больше capacity.
+
+    Attributes:
+        rate (float): Количество запросов в секунду.
+        capacity (float): Наибольшее количество накопленных разрешений.
+        tokens (float): Текущее количество разрешений.
+        updated (float): Время последнего пополнения.
+    """
+    def __init__(self, rate, capacity=None):
+        """Инициализирует полную корзину разрешений.
+
+        Args:
+            rate (float): Количество запросов в секунду.
+            capacity (float or None): Наибольшее количество накопленных разрешений. None - равно rate.
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Функция ждет, пока в корзине появится разрешение, и забирает его."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Harvester:
+    """Класс параллельно скачивает вакансии hh.ru по временным окнам и сразу дописывает их в csv-файл.
+    Все запросы идут через одну сессию aiohttp, частота ограничена TokenBucket, а число одновременных
+    запросов - семафором.
+
+    Attributes:
+        url (str): Адрес метода /vacancies.
+        rps (float): Количество запросов в секунду.
+        concurrency (int): Количество одновременных запросов.
+        retries (int): Количество попыток скачать одну страницу.
+        backoff (float): Пауза перед второй попыткой в секундах, дальше удваивается.
+        per_page (int): Количество вакансий на странице.
+        params (dict): Общие параметры запроса.
+    """
+    def __init__(self, url='https://api.hh.ru/vacancies', rps=5, concurrency=8, retries=5, backoff=0.5, per_page=100,
+                 params=None):
+        """Инициализирует настройки скачивания.
+
+        Args:
+            url (str): Адрес метода /vacancies.
+            rps (float): Количество запросов в секунду.
+            concurrency (int): Количество одновременных запросов.
+            retries (int): Количество попыток скачать одну страницу.
+            backoff (float): Пауза перед второй попыткой в секундах, дальше удваивается.
+            per_page (int): Количество вакансий на странице.
+            params (dict or None): Общие параметры запроса.
+        """
+        self.url = url
+        self.rps = rps
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.per_page = per_page
+        self.params = {"specialization": 1, "found": 1} if params is None else params
+
+    @staticmethod
+    def parse_item(vac):
+        """Функция достает из вакансии hh.ru нужные столбцы.
+
+        Args:
+            vac (dict): Вакансия из ответа hh.ru.
+
+        Returns:
+            list: Значения столбцов columns.
+        """
+        salary = vac["salary"] or {}
+        return [vac["name"], salary.get("from"), salary.get("to"), salary.get("currency"), vac["area"]["name"],
+                vac["published_at"]]
+
+    @staticmethod
+    def new_items(page, ids):
+        """Функция отбирает вакансии страницы, id которых еще не встречались, в том числе повторы внутри
+        самой страницы, и добавляет их id в ids.
+
+        Args:
+            page (dict): Страница ответа hh.ru.
+            ids (set): id уже записанных вакансий.
+
+        Returns:
+            list: Новые вакансии страницы.
+        """
+        new = []
+        for vac in page["items"]:
+            if vac["id"] not in ids:
+                ids.add(vac["id"])
+                new.append(vac)
+        return new
+
+    async def get_page(self, session, bucket, semaphore, date_from, date_to, page):
+        """Функция скачивает одну страницу окна, повторяя запрос при ошибках сети и ответах 429 и 5xx.
+        Остальные ответы 4xx (неверный запрос, нет доступа) повторять бесполезно, они сразу вызывают исключение.
+
+        Args:
+            session (ClientSession): Сессия aiohttp.
+            bucket (TokenBucket): Ограничение частоты запросов.
+            semaphore (Semaphore): Ограничение одновременных запросов.
+            date_from (str): Начало окна.
+            date_to (str): Конец окна.
+            page (int): Номер страницы.
+
+        Returns:
+            dict: Ответ hh.ru.
+        """
+        params = dict(self.params, per_page=self.per_page, page=page, date_from=date_from, date_to=date_to)
+        for attempt in range(self.retries):
+            await bucket.acquire()
+            try:
+                async with semaphore:
+                    async with session.get(self.url, params=params) as response:
+                        if response.status == 429 or response.status >= 500:
+                            raise aiohttp.ClientResponseError(response.request_info, (), status=response.status)
+                        response.raise_for_status()
+                        return json.loads(await response.read())
+            except aiohttp.ClientResponseError as error:
+                if error.status != 429 and error.status < 500 or attempt == self.retries - 1:
+                    raise
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == self.retries - 1:
+                    raise
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def harvest_window(self, session, bucket, semaphore, date_from, date_to, write, first=None):
+        """Функция скачивает все страницы окна: первая страница сообщает их количество, остальные
+        скачиваются параллельно и записываются по мере получения.
+
+        Args:
+            session (ClientSession): Сессия aiohttp.
+            bucket (TokenBucket): Ограничение частоты запросов.
+            semaphore (Semaphore): Ограничение одновременных запросов.
+            date_from (str): Начало окна.
+            date_to (str): Конец окна.
+            write (function): Функция, принимающая страницу ответа hh.ru.
+            first (dict or None): Уже скачанная первая страница окна.
+
+        Returns:
+            dict: Первая страница ответа (в ней есть found и pages).
+        """
+        if first is None:
+            first = await self.get_page(session, bucket, semaphore, date_from, date_to, 0)
+        write(first)
+        pages = [self.get_page(session, bucket, semaphore, date_from, date_to, page)
+                 for page in range(1, first["pages"])]
+        for page in asyncio.as_completed(pages):
+            write(await page)
+        return first
+
+    async def harvest(self, windows, write, harvest_window=None):
+        """Функция скачивает несколько окон через одну сессию.
+
+        Args:
+            windows (list): Пары (начало, конец) окон.
+            write (function): Функция, принимающая страницу ответа hh.ru.
+            harvest_window (function or None): Корутина для одного окна. None - Harvester.harvest_window.
+        """
+        harvest_window = harvest_window or self.harvest_window
+        bucket = TokenBucket(self.rps)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as session:
+            await asyncio.gather(*(harvest_window(session, bucket, semaphore, date_from, date_to, write)
+                                   for date_from, date_to in windows))
+
+    def to_csv(self, windows, file_name):
+        """Функция скачивает окна и построчно записывает вакансии в csv-файл, пропуская повторы по id.
+
+        Args:
+            windows (list): Пары (начало, конец) окон.
+            file_name (str): Название csv-файла, расширения .gz, .bz2, .xz, .zst включают сжатие.
+
+        Returns:
+            int: Количество записанных вакансий.
+        """
+        count, ids = 0, set()
+        with open_file(file_name, 'w', encoding='utf_8', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(columns)
+
+            def write(page):
+                nonlocal count
+                new = Harvester.new_items(page, ids)
+                writer.writerows(Harvester.parse_item(vac) for vac in new)
+                count += len(new)
+
+            asyncio.run(self.harvest(windows, write))
+        return count
+
+
+class VacancySync:
+    """Класс дописывает в csv-файл только новые вакансии hh.ru. Выполненные окна сохраняются в файле
+    контрольной точки, поэтому после сбоя синхронизация продолжается с места остановки. Окно, в котором
+    вакансий больше, чем API отдает постранично (limit), делится пополам. Повторные вакансии отсекаются
+    по id из файла-индекса. Страница считается записанной, когда после ее id в индекс добавлена строка
+    '#размер csv-файла', поэтому страница, прерванная сбоем, откатывается при следующем запуске (см. load_index).
+
+    Attributes:
+        harvester (Harvester): Загрузчик страниц.
+        file_name (str): Название csv-файла с вакансиями.
+        checkpoint (str): Название json-файла с выполненными окнами.
+        index_name (str): Название файла с id записанных вакансий.
+        limit (int): Наибольшее количество вакансий, которое API отдает по одному запросу.
+        min_window (timedelta): Окно короче этого больше не делится.
+    """
+    date_format = '%Y-%m-%dT%H:%M:%S%z'
+
+    def __init__(self, harvester, file_name='hh_vacs.csv', checkpoint='hh_sync.json', index_name='hh_ids.txt',
+                 limit=2000, min_window=timedelta(minutes=1)):
+        """Инициализирует синхронизацию.
+
+        Args:
+            harvester (Harvester): Загрузчик страниц.
+            file_name (str): Название csv-файла с вакансиями.
+            checkpoint (str): Название json-файла с выполненными окнами.
+            index_name (str): Название файла с id записанных вакансий.
+            limit (int): Наибольшее количество вакансий, которое API отдает по одному запросу.
+            min_window (timedelta): Окно короче этого больше не делится.
+        """
+        self.harvester = harvester
+        self.file_name = file_name
+        self.checkpoint = checkpoint
+        self.index_name = index_name
+        self.limit = limit
+        self.min_window = min_window
+
+    @staticmethod
+    def split_range(date_from, date_to, step):
+        """Функция делит промежуток на окна длиной step.
+
+        Args:
+            date_from (str): Начало промежутка.
+            date_to (str): Конец промежутка.
+            step (timedelta): Длина окна.
+
+        Returns:
+            list: Пары (начало, конец) окон.
+        """
+        start = datetime.strptime(date_from, VacancySync.date_format)
+        end = datetime.strptime(date_to, VacancySync.date_format)
+        windows = []
+        while start < end:
+            stop = min(start + step, end)
+            windows.append((start.strftime(VacancySync.date_format), stop.strftime(VacancySync.date_format)))
+            start = stop
+        return windows
+
+    def load_checkpoint(self):
+        """Функция читает контрольную точку.
+
+        Returns:
+            dict: Выполненные окна (done) и конец последней полной синхронизации (synced_to) или пустой словарь.
+        """
+        try:
+            with open(self.checkpoint, encoding='utf_8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def save_checkpoint(self, done, synced_to):
+        """Функция атомарно заменяет файл контрольной точки.
+
+        Args:
+            done (set): Выполненные окна.
+            synced_to (str or None): Конец последней полной синхронизации.
+        """
+        with open(self.checkpoint + '.tmp', 'w', encoding='utf_8') as file:
+            json.dump({'done': sorted(done), 'synced_to': synced_to}, file)
+        os.replace(self.checkpoint + '.tmp', self.checkpoint)
+
+    def pending_range(self, now=None):
+        """Функция возвращает промежуток, который осталось синхронизировать: от конца последней полной
+        синхронизации из контрольной точки (без нее - от начала текущих суток) до начала текущего часа.
+
+        Args:
+            now (datetime or None): Текущее время с часовым поясом. None - время системы.
+
+        Returns:
+            tuple: Начало и конец промежутка для sync.
+        """
+        now = (now or datetime.now().astimezone()).replace(minute=0, second=0, microsecond=0)
+        synced_to = self.load_checkpoint().get('synced_to')
+        start = datetime.strptime(synced_to, VacancySync.date_format) if synced_to else now.replace(hour=0)
+        return start.strftime(VacancySync.date_format), max(start, now).strftime(VacancySync.date_format)
+
+    def load_index(self):
+        """Функция читает id записанных вакансий и откатывает страницу, запись которой прервал сбой: ее id
+        после последней строки '#размер' удаляются из индекса, а csv-файл обрезается до этого размера. Окно
+        такой страницы не отмечено выполненным, поэтому она скачивается снова. Сжатый файл нельзя обрезать
+        по размеру, в нем откатывается только индекс. Индекс без строк '#размер' (прежний формат) читается целиком.
+
+        Returns:
+            set: id записанных вакансий.
+        """
+        try:
+            with open(self.index_name, encoding='utf_8') as file:
+                lines = file.read().split()
+        except OSError:
+            return set()
+        committed, size = 0, None
+        for i, line in enumerate(lines):
+            if line.startswith('#'):
+                committed, size = i + 1, int(line[1:])
+        if size is None:
+            return set(lines)
+        if committed < len(lines):
+            with open(self.index_name + '.tmp', 'w', encoding='utf_8') as file:
+                file.writelines(line + '\n' for line in lines[:committed])
+            os.replace(self.index_name + '.tmp', self.index_name)
+        if not is_compressed(self.file_name) and os.path.exists(self.file_name) and \
+                os.path.getsize(self.file_name) > size:
+            os.truncate(self.file_name, size)
+        return {line for line in lines[:committed] if not line.startswith('#')}
+
+    def sync(self, date_from, date_to, step=timedelta(hours=12)):
+        """Функция скачивает невыполненные окна промежутка и дописывает новые вакансии в csv-файл.
+
+        Args:
+            date_from (str): Начало промежутка.
+            date_to (str): Конец промежутка.
+            step (timedelta): Длина начального окна.
+
+        Returns:
+            int: Количество добавленных вакансий.
+        """
+        state = self.load_checkpoint()
+        done = {tuple(window) for window in state.get('done', [])}
+        ids = self.load_index()
+        windows = [window for window in VacancySync.split_range(date_from, date_to, step) if window not in done]
+        added = 0
+        is_new = not os.path.exists(self.file_name)
+        with open_file(self.file_name, 'a', encoding='utf_8', newline='') as file, \
+                open(self.index_name, 'a', encoding='utf_8') as index:
+            writer = csv.writer(file)
+
+            def commit():
+                file.flush()
+                return f'#{os.path.getsize(self.file_name)}\n'
+
+            if is_new:
+                writer.writerow(columns)
+                index.write(commit())
+                index.flush()
+
+            def write(page):
+                nonlocal added
+                new = Harvester.new_items(page, ids)
+                writer.writerows(Harvester.parse_item(vac) for vac in new)
+                index.write(''.join(vac["id"] + '\n' for vac in new) + commit())
+                index.flush()
+                added += len(new)
+
+            def mark_done(window):
+                done.add(window)
+                self.save_checkpoint(done, state.get('synced_to'))
+
+            async def sync_window(session, bucket, semaphore, window_from, window_to, write):
+                if (window_from, window_to) in done:
+                    return
+                first = await self.harvester.get_page(session, bucket, semaphore, window_from, window_to, 0)
+                start = datetime.strptime(window_from, VacancySync.date_format)
+                end = datetime.strptime(window_to, VacancySync.date_format)
+                if first["found"] > self.limit and end - start > self.min_window:
+                    middle = (start + (end - start) / 2).replace(microsecond=0).strftime(VacancySync.date_format)
+                    await asyncio.gather(sync_window(session, bucket, semaphore, window_from, middle, write),
+                                         sync_window(session, bucket, semaphore, middle, window_to, write))
+                else:
+                    await self.harvester.harvest_window(session, bucket, semaphore, window_from, window_to, write,
+                                                        first)
+                mark_done((window_from, window_to))
+
+            asyncio.run(self.harvester.harvest(windows, write, sync_window))
+        synced_to = state.get('synced_to')
+        start, end = (datetime.strptime(date, VacancySync.date_format) for date in (date_from, date_to))
+        if synced_to is None or start <= datetime.strptime(synced_to, VacancySync.date_format) < end:
+            self.save_checkpoint(done, date_to)
+        return added
+
+
+class Tests(StubServer, TestCase):
+    def setUp(self):
+        requests_log = self.requests_log = []
+
+        def respond(handler):
+            query = parse_qs(urlparse(handler.path).query)
+            page, per_page = int(query['page'][0]), int(query['per_page'][0])
+            requests_log.append((query['date_from'][0], page))
+            if len(requests_log) == 2 or query['date_from'][0] == 'bad':
+                return StubServer.reply(handler, 400 if query['date_from'][0] == 'bad' else 500)
+            found = 25
+            items = [{"id": f"{query['date_from'][0]}-{i}", "name": f"Вакансия {i}", "area": {"name": "Москва"},
+                      "salary": {"from": 1000 * i, "to": None, "currency": "RUR"} if i % 2 else None,
+                      "published_at": query['date_from'][0]}
+                     for i in range(page * per_page, min(found, (page + 1) * per_page))]
+            StubServer.reply(handler, 200, json.dumps({"found": found, "pages": (found + per_page - 1) // per_page,
+                                                       "page": page, "per_page": per_page, "items": items}).encode(),
+                             'application/json')
+
+        url = self.start_server(respond)
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.harvester = Harvester(f'{url}/vacancies', rps=1000, backoff=0.01, per_page=10)
+
+    def test_to_csv(self):
+        file_name = os.path.join(self.folder.name, 'hh_vacs.csv.gz')
+        windows = [('2022-12-23T00:00:00+0300', '2022-12-23T11:59:00+0300'),
+                   ('2022-12-23T12:00:00+0300', '2022-12-23T23:59:00+0300')]
+        self.assertEqual(self.harvester.to_csv(windows, file_name), 50)
+        with open_file(file_name, encoding='utf_8') as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(rows[0], columns)
+        self.assertEqual(len(rows), 51)
+        self.assertEqual(len(self.requests_log), 7)
+
+    def test_client_errors_are_not_retried(self):
+        async def get_page():
+            async with aiohttp.ClientSession() as session:
+                await self.harvester.get_page(session, TokenBucket(1000), asyncio.Semaphore(1), 'bad', 'bad', 0)
+
+        with self.assertRaises(aiohttp.ClientResponseError) as error:
+            asyncio.run(get_page())
+        self.assertEqual((error.exception.status, len(self.requests_log)), (400, 1))
+
+    def test_new_items(self):
+        ids = {'1'}
+        page = {"items": [{"id": "1"}, {"id": "2"}, {"id": "3"}, {"id": "2"}]}
+        self.assertEqual(Harvester.new_items(page, ids), [{"id": "2"}, {"id": "3"}])
+        self.assertEqual(ids, {'1', '2', '3'})
+
+    def test_token_bucket(self):
+        async def take(count):
+            bucket = TokenBucket(20, capacity=1)
+            start = time.monotonic()
+            for i in range(count):
+                await bucket.acquire()
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(take(5)), 0.19)
+
+
+class SyncTests(StubServer, TestCase):
+    def setUp(self):
+        requests_log = self.requests_log = []
+
+        def respond(handler):
+            query = parse_qs(urlparse(handler.path).query)
+            page, per_page = int(query['page'][0]), int(query['per_page'][0])
+            start = datetime.strptime(query['date_from'][0], VacancySync.date_format)
+            end = datetime.strptime(query['date_to'][0], VacancySync.date_format)
+            requests_log.append((start, end, page))
+            minutes = [m for m in range(0, 24 * 60, 30)
+                       if start <= datetime(2022, 12, 23, tzinfo=start.tzinfo) + timedelta(minutes=m) <= end]
+            items = [{"id": str(m), "name": "Программист", "area": {"name": "Москва"}, "salary": None,
+                      "published_at": query['date_from'][0]} for m in minutes]
+            StubServer.reply(handler, 200, json.dumps({"found": len(items),
+                                                       "pages": max(1, (len(items) + per_page - 1) // per_page),
+                                                       "items": items[page * per_page:(page + 1) * per_page]}).encode())
+
+        url = self.start_server(respond)
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        harvester = Harvester(f'{url}/vacancies', rps=1000, per_page=5)
+        self.sync = VacancySync(harvester, *(os.path.join(self.folder.name, name) for name in
+                                             ('hh_vacs.csv', 'hh_sync.json', 'hh_ids.txt')), limit=10)
+
+    def test_sync_splits_and_deduplicates(self):
+        self.assertEqual(self.sync.sync('2022-12-23T00:00:00+0300', '2022-12-23T12:00:00+0300'), 25)
+        self.assertTrue(any(end - start < timedelta(hours=12) for start, end, page in self.requests_log))
+        self.assertEqual(self.sync.sync('2022-12-23T00:00:00+0300', '2022-12-24T00:00:00+0300'), 23)
+        with open(self.sync.file_name, encoding='utf_8') as file:
+            self.assertEqual(len(list(csv.reader(file))), 49)
+
+    def test_sync_resumes_from_checkpoint(self):
+        self.sync.sync('2022-12-23T00:00:00+0300', '2022-12-23T12:00:00+0300')
+        count = len(self.requests_log)
+        self.assertEqual(self.sync.sync('2022-12-23T00:00:00+0300', '2022-12-23T12:00:00+0300'), 0)
+        self.assertEqual(len(self.requests_log), count)
+        now = datetime(2022, 12, 23, 18, 25, tzinfo=timezone(timedelta(hours=3)))
+        self.assertEqual(self.sync.pending_range(now), ('2022-12-23T12:00:00+0300', '2022-12-23T18:00:00+0300'))
+
+    def test_interrupted_page_is_rolled_back(self):
+        self.sync.sync('2022-12-23T00:00:00+0300', '2022-12-23T06:00:00+0300')
+        with open(self.sync.file_name, encoding='utf_8') as file:
+            rows = file.read()
+        with open(self.sync.file_name, 'a', encoding='utf_8') as file, \
+                open(self.sync.index_name, 'a', encoding='utf_8') as index:
+            file.write('Программист,,,,Москва,2022-12-23T07:00:00+0300\n')
+            index.write('840\n')
+        self.assertNotIn('840', self.sync.load_index())
+        with open(self.sync.file_name, encoding='utf_8') as file:
+            self.assertEqual(file.read(), rows)
+        self.assertEqual(self.sync.sync('2022-12-23T00:00:00+0300', '2022-12-23T12:00:00+0300'), 12)
+        with open(self.sync.file_name, encoding='utf_8') as file:
+            self.assertEqual(len(list(csv.reader(file))), 26)
@@ -1,16 +1,25 @@
 import re
 import csv
-from openpyxl import Workbook
-from openpyxl.styles import Font, Border, Side
-from openpyxl.styles.numbers import BUILTIN_FORMATS
-from datetime import datetime
-import matplotlib.pyplot as plt
+import os
+import sys
+import math
+import random
+import itertools
+import json
+import hashlib
+import io
+import contextlib
+import shutil
+from array import array
+import concurrent.futures as cf
 import numpy as np
-from jinja2 import Environment, FileSystemLoader
-import pdfkit
 from unittest import TestCase
 import unittest
 import doctest
+import tempfile
+from profiler import profiler, StageProfiler
+from compressed import open_file, is_compressed
+from fields import FieldParser, RejectReport
 
 dic_naming = {'name': 'Название',
               'description': 'Описание',
@@ -39,11 +48,53 @@ currency_to_rub = {
 }
 heads1 = ["Год", "Средняя зарплата", "Средняя зарплата - ", "Количество вакансий", "Количество вакансий - "]
 heads2 = ["Город", "Уровень зарплаты", '', "Город", "Доля вакансий"]
+report_columns = ('name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at')
+intern_columns = ('area_name', 'salary_currency')
+tag_pattern = re.compile(r"<[^>]+>")
+date_pattern = re.compile(r"\d{4}-\d\d-\d\dT")
+
+
+def sampled_digest(file_name, size, sample_size=1 << 16, samples=16):
+    """Функция хэширует первые size байтов файла. Чтобы проверка занимала миллисекунды и на больших
+    файлах, хэшируются начало, конец и samples блоков из середины. Используется и для ключа кэша
+    (VacancyCache.file_key), и для отпечатка куба (VacancyCube.prefix_fingerprint).
+
+    Args:
+        file_name (str): Название файла.
+        size (int): Длина хэшируемой части в байтах.
+        sample_size (int): Размер хэшируемого блока в байтах.
+        samples (int): Количество блоков из середины.
+
+    Returns:
+        str: Хэш в шестнадцатеричном виде.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_name, 'rb') as file:
+        if size <= sample_size * (samples + 2):
+            digest.update(file.read(size))
+        else:
+            for k in range(samples + 2):
+                file.seek((size - sample_size) * k // (samples + 1))
+                digest.update(file.read(sample_size))
+    return digest.hexdigest()
+
 
 def Foo(a,b):
     return a * b
 
 class Tests(TestCase):
+    def write_csv(self, rows, header=report_columns, file_name=None):
+        """Записывает csv-файл с вакансиями (по умолчанию - во временную папку теста) и возвращает его название."""
+        if file_name is None:
+            folder = tempfile.TemporaryDirectory()
+            self.addCleanup(folder.cleanup)
+            file_name = os.path.join(folder.name, 'vacancies.csv')
+        with open(file_name, 'w', encoding='utf_8_sig', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            writer.writerows(rows)
+        return file_name
+
     def test_clear_tag(self):
         self.assertEqual(DataSet.cleaner_string('<h>Head</h>'), 'Head')
 
@@ -72,6 +123,192 @@ class Tests(TestCase):
     def test_salary_currency_get_salary(self):
         self.assertEqual(Salary(10, 30.0, 'EUR').get_salary_rubles(), 1198.0)
 
+    def test_monthly_currency_rates(self):
+        import sqlite3
+        from currency_rates import CurrencyRates
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.addCleanup(Salary.set_monthly_rates, None)
+        db_name = os.path.join(folder.name, 'rates.sqlite')
+        CurrencyRates(db_name)
+        with sqlite3.connect(db_name) as connection:
+            connection.executemany('INSERT INTO rates VALUES (?, ?, ?)', [('USD', '2004-01', 30.0),
+                                                                          ('USD', '2004-02', 40.0)])
+        Salary.use_currency_rates(db_name)
+        self.assertEqual(Salary(100, 300, 'USD', '2004-02').get_salary_rubles(), 8000.0)
+        self.assertEqual(Salary(100, 300, 'EUR', '2004-02').get_salary_rubles(), 200 * currency_to_rub['EUR'])
+        list_naming = list(report_columns)
+        rows = [['Аналитик', '100', '300', 'USD', 'Москва', f'2004-0{month}-10T10:00:00+0300'] for month in (1, 2)]
+        table = VacancyTable.from_rows(rows, list_naming)
+        self.assertEqual(table.salaries_rub.tolist(), [6000.0, 8000.0])
+        self.assertEqual([vacancy.salary.get_salary_rubles() for vacancy in DataSet.rows_to_vacancies(rows, list_naming)],
+                         [6000.0, 8000.0])
+        self.assertEqual(table[1].salary.get_salary_rubles(), 8000.0)
+
+    def test_statistic_years(self):
+        statistic = Statistic('Программист')
+        statistic.update(Vacancy('Программист', Salary(10000, 20000, 'RUR'), 'Москва', '2007-12-03T17:34:36+0300'))
+        statistic.update(Vacancy('Аналитик', Salary(30000, 30000, 'RUR'), 'Москва', '2009-12-03T17:34:36+0300'))
+        self.assertEqual(statistic.get_dicts()[:4], ({2007: 15000, 2008: 0, 2009: 30000}, {2007: 15000, 2008: 0, 2009: 0},
+                                                     {2007: 1, 2008: 0, 2009: 1}, {2007: 1, 2008: 0, 2009: 0}))
+
+    def test_parallel_statistic(self):
+        file_name = self.write_csv([[f'Программист {i % 3}', '<p>"Много"\nстрок</p>', 1000 * i, 1000 * i + 500, 'RUR',
+                                     f'Город {i % 4}', f'{2010 + i % 5}-01-01T00:00:00+0300'] for i in range(300)],
+                                   ['name', 'description'] + list(report_columns[1:]))
+        serial = DataSet.test_data((file_name, 'Программист 1'), 'Статистика')
+        with profiler.task(True) as stages:
+            self.assertEqual(DataSet.parallel_statistic(file_name, 'Программист 1', 4, min_range=100).get_dicts(),
+                             serial)
+            VacancyTable.from_csv(file_name, 4, min_range=100)
+        self.assertEqual(stages['csv_filter']['rows_in'], 600)
+        self.assertEqual(VacancyCache.load(file_name).get_statistic('Программист 1').get_dicts(), serial)
+        list_naming, ranges = DataSet.byte_ranges(file_name, 4, 100)
+        table = VacancyTable.concatenate([VacancyTable.range_table((file_name, list_naming, start, end, None,
+                                                                    False))[0] for start, end in ranges])
+        self.assertEqual(len(ranges), 4)
+        self.assertEqual(table.get_statistic('Программист 1').get_dicts(), serial)
+        table = VacancyCache.load(file_name)
+        self.assertEqual(table.get_statistic('Программист 1').get_dicts(), serial)
+        self.write_csv([['Программист 1', 1, 3, 'RUR', 'Город', '2020-01-01T00:00:00+0300']], file_name=file_name)
+        self.assertEqual(len(VacancyCache.load(file_name)), 1)
+        self.assertEqual(table.get_statistic('Программист 1').get_dicts(), serial)
+
+    def test_professions_in_one_pass(self):
+        vacancies = [Vacancy('Программист Python', Salary(10000, 20000, 'RUR'), 'Москва', '2007-12-03T17:34:36+0300'),
+                     Vacancy('Аналитик', Salary(30000, 30000, 'RUR'), 'Москва', '2008-12-03T17:34:36+0300')]
+        statistic = Statistic(['Программист', 'Аналитик'])
+        for vacancy in vacancies:
+            statistic.update(vacancy)
+        table = VacancyTable.from_vacancies(vacancies).get_statistic(['Программист', 'Аналитик'])
+        for vac_name in ('Программист', 'Аналитик'):
+            single = Interface.printing_data(vacancies, vac_name, 'Статистика')
+            self.assertEqual(statistic.get_dicts(vac_name), single)
+            self.assertEqual(table.get_dicts(vac_name), single)
+
+    def test_cube_sync(self):
+        file_name = self.write_csv([['Программист', 10000, 20000, 'RUR', 'Москва', '2010-01-05T00:00:00+0300']])
+        cube = VacancyCube(['Аналитик', 'Программист']).sync(file_name)
+        self.assertEqual(cube.fingerprint, f"{cube.offset}:{VacancyCache.file_key(file_name)['hash']}")
+        with open(file_name, 'a', encoding='utf_8', newline='') as file:
+            csv.writer(file).writerow(['Аналитик', 30000, 30000, 'RUR', 'Казань', '2010-05-05T00:00:00+0300'])
+            file.write('Аналитик,1000')
+        cube_name = os.path.join(os.path.dirname(file_name), 'cube.json')
+        cube.save(cube_name)
+        cube = VacancyCube.load(cube_name).sync(file_name)
+        self.assertEqual(cube.series('quarter'), {'2010-Q1': (15000, 1, 15000, 15000),
+                                                  '2010-Q2': (30000, 1, 30000, 30000)})
+        self.assertEqual(cube.get_statistic('Аналитик').get_dicts()[:4], ({2010: 22500}, {2010: 30000},
+                                                                         {2010: 2}, {2010: 1}))
+        self.assertEqual(len(cube.cells), 2)
+        self.write_csv([['Аналитик данных', 10000, 10000, 'RUR', 'Москва', '2011-01-05T00:00:00+0300'],
+                        ['Аналитик', 20000, 20000, 'RUR', 'Москва', 'вчера']], file_name=file_name)
+        cube.sync(file_name)
+        self.assertEqual(cube.series('year', 'Аналитик'), {'2011': (10000, 1, 10000, 10000)})
+        self.assertEqual(cube.rejects.counts, {'published_at': 1})
+
+    def test_quantile_sketch_error(self):
+        values = random.Random(1).sample(range(100000), 100000)
+        first, second = QuantileSketch(0.01, seed=1), QuantileSketch(0.01, seed=2)
+        for value in values[:50000]:
+            first.update(value)
+        second.update_many(values[50000:])
+        sketch = first.merge(second)
+        self.assertLess(sum(len(items) for items in sketch.levels), 3 * sketch.k + 2 * len(sketch.levels))
+        for q, value in sketch.quantiles((0.1, 0.5, 0.9)).items():
+            self.assertAlmostEqual(value / 100000, q, delta=0.01)
+
+    def test_data_prints_quantiles(self):
+        file_name = self.write_csv([['Программист', 1000 * i, 1000 * i, 'RUR', 'Москва', '2011-01-01T00:00:00+0300']
+                                    for i in range(1, 101)])
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            DataSet.test_data((file_name, 'Программист', 'Статистика'), 'Статистика', quantiles=0.01)
+        self.assertIn("Квантили зарплат по годам: {2011: {'p10': 10000, 'p50': 50000, 'p90': 90000}}",
+                      output.getvalue())
+
+    def test_sample_statistic(self):
+        file_name = self.write_csv([[f'Программист {i % 3}', 1000 * (i % 50), 1000 * (i % 50) + 500, 'RUR',
+                                     f'Город {i % 4}', f'{2010 + i % 2}-01-01T00:00:00+0300'] for i in range(2000)] +
+                                   [['Программист 1', 1000, 2000, 'RUR', 'Город 0', 'вчера']])
+        exact = DataSet.get_statistic(file_name, 'Программист 1').get_dicts()
+        sample = SampleStatistic.from_stream(file_name, 'Программист 1', 200, seed=1)
+        self.assertEqual(sample.rejects.counts, {'published_at': 1})
+        self.assertEqual(sum(map(len, sample.samples.values())), 400)
+        dicts, intervals = sample.get_dicts(), sample.get_intervals()
+        self.assertEqual(dicts[2], exact[2])
+        self.assertEqual([list(d) for d in dicts[:4]], [list(d) for d in exact[:4]])
+        self.assertEqual(set(dicts[5]), set(exact[5]))
+        for year, (low, high) in intervals[0].items():
+            self.assertLessEqual(low, exact[0][year])
+            self.assertGreaterEqual(high, exact[0][year])
+        seek = SampleStatistic.from_offsets(file_name, 'Программист 1', 50, seed=1)
+        self.assertAlmostEqual(sum(seek.get_dicts()[2].values()), 2000, delta=200)
+
+    def test_sample_statistic_with_gaps_and_rejects(self):
+        file_name = self.write_csv([['Программист', 'abc' if i % 7 == 0 else 1000 * (i % 50), 1000 * (i % 50) + 500,
+                                     'XYZ' if i % 11 == 0 else 'RUR', f'Город {i % 4}',
+                                     f'{2010 + 2 * (i % 2)}-01-01T00:00:00+0300'] for i in range(600)])
+        exact = DataSet.get_statistic(file_name, 'Программист')
+        sample = SampleStatistic.from_stream(file_name, 'Программист', 50, seed=1)
+        dicts = sample.get_dicts()
+        self.assertEqual(dicts[2], exact.get_dicts()[2])
+        self.assertEqual(dicts[2][2011], 0)
+        self.assertEqual(sample.rejects.counts, exact.rejects.counts)
+        self.assertIsNone(sample.get_intervals()[0][2011])
+        SampleStatistic.from_offsets(file_name, 'Программист', 5, seed=1).get_intervals()
+
+    def test_render_skips_unchanged(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(folder.name)
+        result = ({2022: 100}, {2022: 50}, {2022: 2}, {2022: 1}, {'Москва': 100}, {'Москва': 1.0})
+        self.assertEqual(Report.render(result, 'Программист', ('png', 'xlsx')), ['png', 'xlsx'])
+        self.assertEqual(Report.render(result, 'Программист', ('png', 'xlsx')), [])
+        self.assertEqual(Report.render(result[:5] + ({'Москва': 0.5},), 'Программист', ('xlsx',)), ['xlsx'])
+        self.assertTrue(os.path.exists('graph.png'))
+
+    def test_vacancy_table_rows(self):
+        table = VacancyTable.from_vacancies([Vacancy('Аналитик', Salary('10000.0', '20000.0', 'EUR'), 'Москва',
+                                                     '2007-12-03T17:34:36+0300')])
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table[0].salary.get_salary_rubles(), table.salaries_rub[0])
+        self.assertEqual([(v.name, v.area_name, v.published_at) for v in table],
+                         [('Аналитик', 'Москва', '2007-12-03T17:34:36+0300')])
+        currencies = [f'C{i}' for i in range(300)]
+        currency_to_rub.update(dict.fromkeys(currencies, 1))
+        self.addCleanup(lambda: [currency_to_rub.pop(currency) for currency in currencies])
+        table = VacancyTable.from_vacancies([Vacancy('Аналитик', Salary(1, 1, currency), 'Москва',
+                                                     '2007-12-03T17:34:36+0300') for currency in currencies])
+        self.assertEqual(table[299].salary.salary_currency, 'C299')
+        self.assertEqual(VacancyTable.concatenate([table, table])[599].salary.salary_currency, 'C299')
+        with self.assertRaises(ValueError):
+            VacancyTable.check_dictionaries({'currency_ids': dict.fromkeys(range((1 << 16) + 1))})
+
+    def test_malformed_rows_are_rejected(self):
+        list_naming = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
+        rows = [['Аналитик', '10000.0', '20000.0', 'EUR', 'Москва', '2007-12-03T17:34:36+0300'],
+                ['Аналитик', 'abc', '20000.0', 'RUR', 'Москва', '2007-12-03T17:34:36+0300'],
+                ['Аналитик', '10000.0', '20000.0', 'XYZ', 'Москва', '2007-12-03T17:34:36+0300'],
+                ['Аналитик', '10000.0', '20000.0', 'RUR', 'Москва', '2007-13-03T17:34:36+0300'],
+                ['Программист', '30000', '50000', 'RUR', 'Пермь', '2008-01-01T09:00:00+03:00']]
+        table = VacancyTable.from_rows(rows, list_naming)
+        statistic = Statistic('Аналитик')
+        for vacancy in DataSet.rows_to_vacancies(rows, list_naming, rejects=statistic.rejects):
+            statistic.update(vacancy)
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table[1].published_at, '2008-01-01T09:00:00+03:00')
+        self.assertEqual(Interface.printing_data(table, 'Аналитик', 'Статистика'), statistic.get_dicts())
+        self.assertEqual(table.get_statistic('Аналитик').get_dicts(), statistic.get_dicts())
+        self.assertEqual(table.rejects.counts, statistic.rejects.counts)
+        self.assertEqual(len(statistic.rejects), 3)
+        file_name = self.write_csv(rows, list_naming)
+        for _ in range(2):
+            cached = DataSet.get_statistic(file_name, 'Аналитик', cache=True)
+            self.assertEqual(cached.rejects.counts, statistic.rejects.counts)
+            self.assertEqual(cached.rejects.examples, table.rejects.examples)
+
 
 class Report:
     """Класс создает файлы (xlsx,pdf,png) для отображения статистики вакансии, по необходимым требованиям.
@@ -79,6 +316,8 @@ class Report:
     Attributes:
         report (Workbook): Переменная с функций по созданию xlxs-файла.
     """
+    artifacts = {'png': 'graph.png', 'xlsx': 'report.xlsx', 'pdf': 'report.pdf'}
+    stages = {'png': 'graphics', 'xlsx': 'excel', 'pdf': 'pdf'}
     def __init__(self):
         """Инициализация объекта для создания xlsx-файла в корневой папке проекта.
 
@@ -87,9 +326,85 @@ class Report:
         """
         self.report = Report.generate_excel(result, options.parameter[1])
 
+    @staticmethod
+    def render_artifact(args):
+        """Функция создает один файл отчета, библиотека для него импортируется только здесь. Если замеры
+        включены, файл строится в этапе graphics, excel или pdf собственного профилировщика процесса, а замеры
+        возвращаются, чтобы родительский процесс добавил их в свой отчет.
+
+        Args:
+            args (tuple): Формат (png, xlsx или pdf), статистика вакансий, название вакансии и включены ли замеры.
+
+        Returns:
+            tuple: Формат созданного файла и замеры этапов.
+        """
+        file_format, result, vacancy, profile = args
+        stage_profiler = StageProfiler()
+        if profile:
+            stage_profiler.enable(None)
+        with stage_profiler.stage(Report.stages[file_format]):
+            if file_format == 'png':
+                Report.graphics(result, vacancy)
+            elif file_format == 'xlsx':
+                Report.generate_excel(result, vacancy)
+            else:
+                Report.generate_pdf(result, vacancy, heads1, heads2)
+        return file_format, stage_profiler.stages
+
+    @staticmethod
+    def render(result, vacancy, formats=('png', 'xlsx', 'pdf'), hashes_name='report_hashes.json'):
+        """Функция создает файлы отчета одновременно в отдельных процессах. Файл, построенный по той же статистике,
+        пропускается: хэш статистики каждого файла хранится в hashes_name. pdf строится после png, так как
+        шаблон может использовать график.
+
+        Args:
+            result (tuple): Статистика вакансий.
+            vacancy (str): Название необходимой вакансии.
+            formats (tuple): Нужные форматы: png, xlsx, pdf.
+            hashes_name (str): json-файл с хэшами статистики созданных файлов.
+
+        Returns:
+            list: Форматы, которые были построены заново.
+        """
+        digest = hashlib.sha256(repr((result, vacancy, heads1, heads2)).encode('utf_8')).hexdigest()
+        hashes = {}
+        if os.path.exists(hashes_name):
+            with open(hashes_name, encoding='utf_8') as file:
+                hashes = json.load(file)
+        todo = [file_format for file_format in formats if not (os.path.exists(Report.artifacts[file_format])
+                                                               and hashes.get(file_format) == digest)]
+        errors = []
+        if len(todo) == 1:
+            with profiler.stage(Report.stages[todo[0]]):
+                Report.render_artifact((todo[0], result, vacancy, False))
+            hashes[todo[0]] = digest
+        elif todo:
+            waiting = 'pdf' in todo and 'png' in todo
+            with cf.ProcessPoolExecutor(len(todo)) as executor:
+                futures = {executor.submit(Report.render_artifact, (file_format, result, vacancy, profiler.enabled)):
+                           file_format for file_format in todo if not (waiting and file_format == 'pdf')}
+                while futures:
+                    done, _ = cf.wait(futures, return_when=cf.FIRST_COMPLETED)
+                    for future in done:
+                        file_format = futures.pop(future)
+                        try:
+                            profiler.merge(future.result()[1])
+                            hashes[file_format] = digest
+                        except Exception as error:
+                            errors.append(error)
+                        if file_format == 'png' and waiting:
+                            futures[executor.submit(Report.render_artifact,
+                                                    ('pdf', result, vacancy, profiler.enabled))] = 'pdf'
+        with open(hashes_name, 'w', encoding='utf_8') as file:
+            json.dump(hashes, file)
+        if errors:
+            raise errors[0]
+        return todo
+
     @staticmethod
     def generate_excel(result, vacancy):
-        """ Функция создает excel-файл с данными из статистики, оформленный по необходимым требованиям.
+        """ Функция создает excel-файл с данными из статистики, оформленный по необходимым требованиям. Книга
+        пишется в потоковом режиме openpyxl (write_only), поэтому ширина столбцов считается по строкам до записи.
 
         Args:
             result (tuple): Статистика вакансий.
@@ -98,6 +413,12 @@ class Report:
         Returns:
             Workbook: xlsx- файл, появляющийся в корневой папке проекта.
         """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, Border, Side
+        from openpyxl.styles.numbers import BUILTIN_FORMATS
+        from openpyxl.utils import get_column_letter
+
         def as_text(val):
             """Функция изменяет тип объекта на str, и заменяет значение None на "" (пустоту).
 
@@ -112,45 +433,44 @@ class Report:
                 return ""
             return str(val)
 
-        def cell_parameters(sheet):
-            """Функция создает рамки вокруг ячеек, и отлаживает столбец по длине загаловка.
+        def write_sheet(sheet, heads, rows, no_border=None):
+            """Функция задает ширину столбцов по самому длинному значению и записывает заголовок и строки
+            с рамками вокруг ячеек.
 
             Args:
-                sheet (sheet): xlsx лист из модуля openpyxl
-
-            Returns:
-                sheet: Измененный xlxs лист из модуля openpyxl
+                sheet (WriteOnlyWorksheet): Лист xlsx-файла в потоковом режиме.
+                heads (list): Заголовок.
+                rows (list): Строки листа.
+                no_border (int or None): Номер столбца без рамок.
             """
-            thin = Side(border_style="thin", color="000000")
-            for column in sheet.columns:
-                length = max(len(as_text(cell.value)) for cell in column)
-                sheet.column_dimensions[column[0].column_letter].width = length + 2
-                for cell in column:
-                    if isinstance(cell.value, float):
+            for i, column in enumerate(zip(heads, *rows)):
+                length = max(len(as_text(value)) for value in column)
+                sheet.column_dimensions[get_column_letter(i + 1)].width = length + 2
+            for row_number, row in enumerate([heads] + rows):
+                cells = []
+                for i, value in enumerate(row):
+                    cell = WriteOnlyCell(sheet, value=value)
+                    if row_number == 0:
+                        cell.font = bold
+                    if isinstance(value, float):
                         cell.number_format = BUILTIN_FORMATS[10]
-                    if cell.column_letter != "C" and sheet == sheet2:
-                        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
-                    if sheet == sheet1:
-                        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
-            return sheet
+                    if i != no_border:
+                        cell.border = border
+                    cells.append(cell)
+                sheet.append(cells)
 
         salary_by_years, vac_salary_by_years, vacs_by_years, vac_counts_by_years, salary_by_cities, vacs_by_cities = result
-        wb = Workbook()
-        sheet1 = wb.active
-        sheet1.title = "Статистика по годам"
+        thin = Side(border_style="thin", color="000000")
+        border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        bold = Font(bold=True)
+        wb = Workbook(write_only=True)
+        sheet1 = wb.create_sheet("Статистика по годам")
         sheet2 = wb.create_sheet("Статистика по городам")
         heads3 = [s.replace('-', f'- {vacancy}') for s in heads1]
-        for i, value in enumerate(heads3):
-            sheet1.cell(row=1, column=(i+1), value=value).font = Font(bold=True)
-        for key, value in salary_by_years.items():
-            sheet1.append([key, value, vac_salary_by_years[key], vacs_by_years[key], vac_counts_by_years[key]])
-        for i, value in enumerate(heads2):
-            sheet2.cell(row=1, column=(i+1), value=value).font = Font(bold=True)
-        for (key, value), (k, v) in zip(salary_by_cities.items(), vacs_by_cities.items()):
-            sheet2.append([key, value, '', k, v])
-
-        cell_parameters(sheet1)
-        cell_parameters(sheet2)
+        write_sheet(sheet1, heads3, [[key, value, vac_salary_by_years[key], vacs_by_years[key], vac_counts_by_years[key]]
+                                     for key, value in salary_by_years.items()])
+        write_sheet(sheet2, heads2, [[key, value, '', k, v] for (key, value), (k, v) in
+                                     zip(salary_by_cities.items(), vacs_by_cities.items())], no_border=2)
 
         return wb.save("report.xlsx")
 
@@ -164,43 +484,9 @@ class Report:
         Returns:
             function: Функция, которая создает png-файл в папке проекта.
         """
-    @staticmethod
-    def slash(citites):
-        """Функция переносит на следующую строку города в названиях которых есть тире или пробел.
-        Args:
-            citites (dict): Словарь со значениями статистики для преобразования.
-        Returns:
-            list: Список с замененными символами.
-        """
-        citites = [s.replace('-', '\n').replace(' ', '\n') for s in citites]
-        return citites
-    @staticmethod
-    def top10(dict):
-
-        """Преобразовывыет словарь для круговой диаграммы, сохраняет первые 10 пар ключ-значения,
-            а остальное приводит к общему ключу ("Другие").
-
-        Args:
-            dict (dict): Словарь со значениями статистики для преобразования.
-        Returns:
-            dict: Преобразованный словарь.
-
-        >>>Report.top10({2007: 38916, 2008: 43646, 2009: 42492, 2010: 43846, 2011: 47451, 2012: 48243, 2013: 51510, 2014: 50658, 2015: 52696, 2016: 62675, 2017: 60935, 2018: 58335})
-        {2007: 38916, 2008: 43646, 2009: 42492, 2010: 43846, 2011: 47451, 2012: 48243,
-        2013: 51510, 2014: 50658, 2015: 52696, 2016: 62675})
-
-        >>>Report.top10({2007: 38916, 2008: 43646, 2009: 42492})
-        {2007: 38916, 2008: 43646, 2009: 42492})
-        """
-        first10pairs = {k: dict[k] for k in list(dict)[:11]}
-        lastpairs = {k: dict[k] for k in list(dict)[10:]}
-        count = 0
-        for i in lastpairs.values():
-            count += i
-        lastpairscount = {"Другие": count}
-        first10pairs.update(lastpairscount)
-        return first10pairs
-
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
         salary_by_years, vac_salary_by_years, vacs_by_years, vac_counts_by_years, salary_by_cities, vacs_by_cities = result
         width = 0.4
         x_nums = np.arange(len(salary_by_years.keys()))
@@ -229,20 +515,60 @@ class Report:
 
         ax = fig.add_subplot(223)
         ax.set_title("Уровень зарплат по городам")
-        ax.barh(list(reversed(slash(salary_by_cities.keys()))), list(reversed(list(salary_by_cities.values()))))
+        ax.barh(list(reversed(Report.slash(salary_by_cities.keys()))), list(reversed(list(salary_by_cities.values()))))
         plt.yticks(fontsize=6,linespacing=0.66)
         ax.tick_params(axis="both", labelsize=8)
         ax.grid(True, axis="x")
 
         ax = fig.add_subplot(224)
-        cities_finaly = top10(vacs_by_cities)
+        cities_finaly = Report.top10(vacs_by_cities)
         ax.set_title("Доля вакансий по городам")
         ax.pie(list(cities_finaly.values()), labels=list(cities_finaly.keys()), textprops={'fontsize':6})
         ax.axis("equal")
         plt.tight_layout()
 
-        return plt.savefig('graph.png', dpi=300)
+        graph = plt.savefig('graph.png', dpi=300)
+        plt.close(fig)
+        return graph
 
+    @staticmethod
+    def slash(citites):
+        """Функция переносит на следующую строку города в названиях которых есть тире или пробел.
+        Args:
+            citites (dict): Словарь со значениями статистики для преобразования.
+        Returns:
+            list: Список с замененными символами.
+        """
+        citites = [s.replace('-', '\n').replace(' ', '\n') for s in citites]
+        return citites
+    @staticmethod
+    def top10(dict):
+
+        """Преобразовывыет словарь для круговой диаграммы, сохраняет первые 10 пар ключ-значения,
+            а остальное приводит к общему ключу ("Другие").
+
+        Args:
+            dict (dict): Словарь со значениями статистики для преобразования.
+        Returns:
+            dict: Преобразованный словарь.
+
+        >>>Report.top10({2007: 38916, 2008: 43646, 2009: 42492, 2010: 43846, 2011: 47451, 2012: 48243, 2013: 51510, 2014: 50658, 2015: 52696, 2016: 62675, 2017: 60935, 2018: 58335})
+        {2007: 38916, 2008: 43646, 2009: 42492, 2010: 43846, 2011: 47451, 2012: 48243,
+        2013: 51510, 2014: 50658, 2015: 52696, 2016: 62675})
+
+        >>>Report.top10({2007: 38916, 2008: 43646, 2009: 42492})
+        {2007: 38916, 2008: 43646, 2009: 42492})
+        """
+        first10pairs = {k: dict[k] for k in list(dict)[:11]}
+        lastpairs = {k: dict[k] for k in list(dict)[10:]}
+        count = 0
+        for i in lastpairs.values():
+            count += i
+        lastpairscount = {"Другие": count}
+        first10pairs.update(lastpairscount)
+        return first10pairs
+
+    @staticmethod
     def generate_pdf(result, vacancy, heads1, heads2):
         """ Функция работает в паре с html-кодом. Чтобы преобразовать данные ввиде xlxs и png в pdf-формат.
 
@@ -250,6 +576,8 @@ class Report:
             result (tuple): Статистика вакансии, полученная из класса Interface.
             vacancy (str): Название необходимой вакансии, полученная из функций get_parameters.
         """
+        import pdfkit
+        from jinja2 import Environment, FileSystemLoader
         salary_by_years, vac_salary_by_years, vacs_by_years, vac_counts_by_years, salary_by_cities, vacs_by_cities = result
         config = pdfkit.configuration(wkhtmltopdf=r'E:\apps\wkhtmltopdf\bin\wkhtmltopdf.exe')
 
@@ -299,240 +627,1914 @@ class Interface:
     @staticmethod
     def printing_data(dic_vacancies, vac_name, method):
         """Функция формирует статистику для её визуализаий и рассчитывает динамику необходимых требований.
+        Вакансии обрабатываются за один проход, поэтому вместо списка можно передать генератор.
 
         Args:
-            dic_vacancies (list): Список вакансий.
+            dic_vacancies (list or generator or VacancyTable): Список вакансий.
             vac_name (str): Профессия введенная пользователем.
             method (str): Способ вывода полученных результатов.
 
         Returns:
             tuple: Кортеж со словарями, в которых хранится статистика по csv-файлу.
         """
-        years = set()
-        for vacancy in dic_vacancies:
-            years.add(int(datetime.strptime(vacancy.published_at, '%Y-%m-%dT%H:%M:%S%z').strftime('%Y')))
-        years = sorted(list(years))
-        years = list(range(min(years), max(years) + 1))
-
-        salary_by_years = {year: [] for year in years}
-        vac_salary_by_years = {year: [] for year in years}
-
-        vacs_by_years = {year: 0 for year in years}
-        vac_counts_by_years = {year: 0 for year in years}
-
+        if isinstance(dic_vacancies, VacancyTable):
+            return Interface.output_data(dic_vacancies.get_statistic(vac_name).get_dicts(), method)
+        statistic = Statistic(vac_name)
         for vacancy in dic_vacancies:
-            year = int(datetime.strptime(vacancy.published_at, '%Y-%m-%dT%H:%M:%S%z').strftime('%Y'))
-            salary_by_years[year].append(vacancy.salary.get_salary_rubles())
-            vacs_by_years[year] += 1
-            if vac_name in vacancy.name:
-                vac_salary_by_years[year].append(vacancy.salary.get_salary_rubles())
-                vac_counts_by_years[year] += 1
-
-        salary_by_years = {key: int(sum(value) / len(value)) if len(value) != 0 else 0 for key, value in
-                           salary_by_years.items()}
-        vac_salary_by_years = {key: int(sum(value) / len(value)) if len(value) != 0 else 0 for key, value in
-                               vac_salary_by_years.items()}
-
-        dic_area_name = {}
-        for vacancy in dic_vacancies:
-            if vacancy.area_name not in dic_area_name:
-                dic_area_name[vacancy.area_name] = [vacancy.salary.get_salary_rubles()]
-            else:
-                dic_area_name[vacancy.area_name].append(vacancy.salary.get_salary_rubles())
+            statistic.update(vacancy)
+        return Interface.output_data(statistic.get_dicts(), method)
 
-        area_name_list = dic_area_name.items()
-        area_name_list = [x for x in area_name_list if len(x[1]) / len(dic_vacancies) > 0.01]
-        area_name_list = sorted(area_name_list, key=lambda item: sum(item[1]) / len(item[1]), reverse=True)
-        salary_by_cities = {item[0]: int(sum(item[1]) / len(item[1])) for item in area_name_list[0: min(len(area_name_list), 10)]}
-        vacs_dic = {}
+    @staticmethod
+    def output_data(dicts, method, intervals=None):
+        """Функция выводит статистику в консоль или возвращает её для построения отчетов.
 
-        for vacancy in dic_vacancies:
-            if vacancy.area_name in vacs_dic:
-                vacs_dic[vacancy.area_name] += 1
-            else:
-                vacs_dic[vacancy.area_name] = 1
+        Args:
+            dicts (tuple): Кортеж со словарями статистики.
+            method (str): Способ вывода полученных результатов.
+            intervals (tuple or None): Доверительные интервалы приблизительной статистики. None - статистика точная.
 
-        vacs_counts = {x: round(y / len(dic_vacancies), 4) for x, y in vacs_dic.items()}
-        vacs_counts = {k: val for k, val in vacs_counts.items() if val >= 0.01}
-        vacs_by_cities = dict(sorted(vacs_counts.items(), key=lambda item: item[1], reverse=True))
-        vacs_by_cities = dict(list(vacs_by_cities.items())[:10])
+        Returns:
+            tuple: Кортеж со словарями, в которых хранится статистика по csv-файлу.
+        """
+        salary_by_years, vac_salary_by_years, vacs_by_years, vac_counts_by_years, salary_by_cities, vacs_by_cities = dicts
         if method == "Вакансии":
-            print("Динамика уровня зарплат по годам:", salary_by_years)
-            print("Динамика количества вакансий по годам:", vacs_by_years)
-            print("Динамика уровня зарплат по годам для выбранной профессии:", vac_salary_by_years)
-            print("Динамика количества вакансий по годам для выбранной профессии:", vac_counts_by_years)
-            print("Уровень зарплат по городам (в порядке убывания):", salary_by_cities)
-            print("Доля вакансий по городам (в порядке убывания):", vacs_by_cities)
+            if intervals is not None:
+                print("Приблизительная статистика по выборке, под значениями - 95% доверительные интервалы")
+            titles = ["Динамика уровня зарплат по годам:", "Динамика количества вакансий по годам:",
+                      "Динамика уровня зарплат по годам для выбранной профессии:",
+                      "Динамика количества вакансий по годам для выбранной профессии:",
+                      "Уровень зарплат по городам (в порядке убывания):", "Доля вакансий по городам (в порядке убывания):"]
+            for title, i in zip(titles, (0, 2, 1, 3, 4, 5)):
+                print(title, dicts[i])
+                if intervals is not None:
+                    print("    интервалы:", intervals[i])
             exit()
         elif method == "Статистика":
-            dicts = salary_by_years, vac_salary_by_years, vacs_by_years, vac_counts_by_years, salary_by_cities, vacs_by_cities
             return dicts
 
+    @staticmethod
+    def output_quantiles(quantiles):
+        """Функция выводит в консоль квантили зарплат из Statistic.get_quantiles.
+
+        Args:
+            quantiles (tuple): Три словаря ключ - {доля: зарплата}: по годам, по годам для профессии и по городам.
+        """
+        titles = ["Квантили зарплат по годам:", "Квантили зарплат по годам для выбранной профессии:",
+                  "Квантили зарплат по городам (в порядке убывания зарплаты):"]
+        for title, dic in zip(titles, quantiles):
+            print(title, {key: {f'p{round(q * 100)}': None if value is None else int(value)
+                                for q, value in values.items()} for key, values in dic.items()})
 
-class DataSet:
-    """ Класс для получения обработанных данных csv-файла в удобном формате.
+    @staticmethod
+    def get_option(name, default=None):
+        """Функция возвращает значение параметра командной строки вида --name value.
+
+        Args:
+            name (str): Название параметра, например --sample.
+            default (str or None): Значение, если параметра нет.
+
+        Returns:
+            str or None: Значение параметра.
+        """
+        if name in sys.argv[:-1]:
+            return sys.argv[sys.argv.index(name) + 1]
+        return default
+
+
+class NameIndex:
+    """Класс ищет профессии в названиях вакансий. Каждое уникальное название проверяется один раз, а
+    профессии-кандидаты отбираются по первой триграмме: если профессия входит в название, то и её первые
+    три символа входят в него.
 
     Attributes:
-        file_name (str): Введеная пользователем название csv-файла, полученная функций get_parameters.
+        professions (list): Профессии без повторов.
+        short (list): Номера профессий короче трех символов, они проверяются всегда.
+        trigrams (dict): Словарь триграмма - номера профессий, начинающихся с неё.
+        matches (dict): Уже проверенные названия.
     """
-    def __init__(self, file_name):
-        """ Инициализация объекта file_name, и полученного обработаного списка вакансий vacancies_objects.
+    def __init__(self, professions):
+        """Инициализирует индекс по списку профессий.
 
         Args:
-            file_name (str): Введеная пользователем название csv-файла, полученная функций get_parameters.
-            vacancies_objects (list): Обработанный список вакансий.
+            professions (list): Профессии введенные пользователем.
         """
-        self.file_name = file_name
-        self.vacancies_objects = DataSet.csv_filter(file_name)
+        self.professions = list(dict.fromkeys(professions))
+        self.short = []
+        self.trigrams = {}
+        for i, profession in enumerate(self.professions):
+            if len(profession) < 3:
+                self.short.append(i)
+            else:
+                self.trigrams.setdefault(profession[:3], []).append(i)
+        self.matches = {}
 
-    @staticmethod
-    def cleaner_string(text):
-        """ Функция очищает строку от html-тегов и заменяет \n (знак табуляций - перенос строки) на пробел.
+    def match(self, name):
+        """Функция находит профессии, входящие в название вакансии.
 
         Args:
-             text (str): Строка из вакансий проходящая фильтрация.
+            name (str): Название вакансии.
 
         Returns:
-            str: Очищенная строка.
+            tuple: Номера найденных профессий в списке professions.
 
-        >>> DataSet.cleaner_string('<h>Head</h>')
-        'Head'
-        >>> DataSet.cleaner_string('<h>Head    res</h>')
-        'Head res'
-        >>> DataSet.cleaner_string(' <h> Head res</h> ')
-        'Head res'
+        >>> NameIndex(['Программист', 'Аналитик', '']).match('Программист Python')
+        (0, 2)
         """
-        text = re.sub(r"<[^>]+>", "", text)
-        text = " ".join(text.split())
-        return text
+        found = self.matches.get(name)
+        if found is None:
+            candidates = set(self.short)
+            for trigram in {name[i:i + 3] for i in range(len(name) - 2)}:
+                candidates.update(self.trigrams.get(trigram, ()))
+            found = tuple(i for i in sorted(candidates) if self.professions[i] in name)
+            self.matches[name] = found
+        return found
+
+
+class QuantileSketch:
+    """Класс приближенно считает квантили зарплат за один проход (KLL-скетч). Значения хранятся по уровням:
+    на уровне h каждое значение весит 2**h, а переполненный уровень сортируется, и в следующий уровень
+    переходит каждое второе значение. Память не зависит от количества значений, а скетчи разных частей
+    данных можно объединять.
 
-    @staticmethod
-    def csv_filter(file_name):
-        """ Обрабатывает список с вакансиями, оставляя необходимые объекты, и чистит вакансий с пустыми ячейками.
+    Attributes:
+        k (int): Размер верхнего уровня, ошибка ранга около 1.65 / k.
+        levels (list): Значения по уровням.
+        count (int): Количество добавленных значений.
+    """
+    c = 2 / 3
 
-        Args:
-            file_name (str): Введеная пользователем название csv-файла, полученная функций get_parameters.
+    def __init__(self, error=0.01, seed=0):
+        """Инициализирует пустой скетч.
 
-        Returns:
-            list: Обработаные и отфильтрованые вакансий от html-тегов (благодаря функций cleaner_string).
+        Args:
+            error (float): Допустимая ошибка ранга (доля от количества значений).
+            seed (int): Начальное значение генератора случайных чисел, чтобы результаты повторялись.
         """
-        list_naming, vacancies = DataSet.csv_reader(file_name)
-        okay = [x for x in vacancies if len(x) == len(list_naming) and '' not in x]
-        people_data = []
-        dic_changed_vacancies = {}
-        for line in okay:
-            for i in range(len(line)):
-                dic_changed_vacancies[list_naming[i]] = DataSet.cleaner_string(line[i])
-            people_data.append(Vacancy(dic_changed_vacancies['name'],
-                                Salary(dic_changed_vacancies['salary_from'], dic_changed_vacancies['salary_to'],
-                                dic_changed_vacancies['salary_currency']),
-                                dic_changed_vacancies['area_name'], dic_changed_vacancies['published_at']))
-        return people_data
+        self.k = max(8, math.ceil(1.65 / error))
+        self.levels = [[]]
+        self.count = 0
+        self.random = random.Random(seed)
 
-    @staticmethod
-    def csv_reader(file_name):
-        # Функция открывает и преобразовывает csv формат.
+    def capacity(self, level):
+        """Функция возвращает вместимость уровня: чем ниже уровень, тем она меньше.
 
-        # Args:
-            # file_name (str): Введеная пользователем название csv-файла, полученная функций get_parameters.
+        Args:
+            level (int): Номер уровня.
 
-        #Returns:
-            # list (list_naming): Название столбцов csv-файла.
-            # list (vacancies): Список списков всех вакансий csv-файла.
+        Returns:
+            int: Количество значений, при котором уровень сжимается.
+        """
+        return int(math.ceil(self.k * QuantileSketch.c ** (len(self.levels) - level - 1))) + 1
 
-       with open(file_name, encoding="utf_8_sig") as file:
-            text = csv.reader(file)
-            data = [x for x in text]
-            if len(data) == 0:
-                print("Пустой файл")
-                exit()
-            list_naming = data[0]
-            vacancies = data[1:]
-            return list_naming, vacancies
+    def update(self, value):
+        """Функция добавляет одно значение.
+
+        Args:
+            value (float): Значение.
+        """
+        self.levels[0].append(value)
+        self.count += 1
+        if len(self.levels[0]) >= self.capacity(0):
+            self.compress()
 
+    def update_many(self, values):
+        """Функция добавляет значения порциями размером с нижний уровень.
 
-    @staticmethod
-    def test_data(arg, method):
-        """Функция проверяет файл на пустоту.
+        Args:
+            values (list or ndarray): Значения.
+        """
+        values = values.tolist() if hasattr(values, 'tolist') else list(values)
+        step = self.capacity(0)
+        for i in range(0, len(values), step):
+            self.levels[0].extend(values[i:i + step])
+            self.count += len(values[i:i + step])
+            self.compress()
+
+    def compress(self):
+        """Функция сжимает переполненные уровни снизу вверх."""
+        for level in range(len(self.levels)):
+            items = self.levels[level]
+            if len(items) < self.capacity(level):
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            items.sort()
+            rest = items[:len(items) % 2]
+            self.levels[level + 1].extend(items[len(rest) + self.random.randint(0, 1)::2])
+            self.levels[level] = rest
+
+    def merge(self, other):
+        """Функция добавляет в скетч значения другого скетча.
 
         Args:
-            arg(tuple): Содержит данные веденные пользователем.
-            method(str): Пользовательский метод изображения результатов.
+            other (QuantileSketch): Скетч другой части данных.
 
         Returns:
-            tuple: Кортеж с полностью обработанными словарями.
+            QuantileSketch: Объединенный скетч.
         """
-        if arg is not None:
-            data = DataSet(arg[0])
-            tuple_dicts = Interface.printing_data(data.vacancies_objects, arg[1], method)
-            return tuple_dicts
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self.compress()
+        return self
 
+    def quantiles(self, qs):
+        """Функция считает квантили по ближайшему рангу.
 
-class Salary:
-    """ Класс для представления зарплаты.
+        Args:
+            qs (tuple): Доли от 0 до 1, например (0.1, 0.5, 0.9).
+
+        Returns:
+            dict: Словарь доля - значение, None для пустого скетча.
+
+        >>> sketch = QuantileSketch()
+        >>> sketch.update_many(range(1, 101))
+        >>> sketch.quantiles((0.1, 0.5, 0.9))
+        {0.1: 10, 0.5: 50, 0.9: 90}
+        """
+        weighted = sorted((value, 1 << level) for level, items in enumerate(self.levels) for value in items)
+        result = {}
+        for q in qs:
+            target, cumulative, found = q * self.count, 0, None
+            for value, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    found = value
+                    break
+            result[q] = found
+        return result
+
+
+class Statistic:
+    """Класс накапливает статистику по вакансиям за один проход, храня только суммы и количества.
+    Память не зависит от размера csv-файла, а частичные результаты можно объединять. Статистику по
+    нескольким профессиям можно посчитать за один проход: одна профессия - частный случай списка.
 
     Attributes:
-        salary_from (int): Нижняя граница оклада.
-        salary_to (int): Верхняя граница оклада.
-        salary_currency (str): Валюта оклада.
+        vac_names (list): Профессии введенные пользователем.
+        index (NameIndex): Индекс для поиска профессий в названиях вакансий.
+        count (int): Количество обработанных вакансий.
+        years (dict): Сумма зарплат и количество вакансий по годам.
+        vac_years (dict): Для каждой профессии сумма зарплат и количество вакансий по годам.
+        cities (dict): Сумма зарплат и количество вакансий по городам.
+        quantiles (float or None): Допустимая ошибка квантилей. None - квантили не считаются.
+        sketches (dict or None): Скетчи зарплат по годам, годам профессий и городам.
+        rejects (RejectReport): Некорректные значения пропущенных вакансий.
     """
-    def __init__(self, salary_from, salary_to, salary_currency):
-        """ Инициализирует объект Salary, выполняет конвертацию для целочисленных полей. Вычисляет среднюю зарплату
-        из вилки и переводить в рубли, при помощи словоря - currency_to_rub.
+    def __init__(self, vac_names, quantiles=None):
+        """Инициализирует пустые счетчики статистики.
 
         Args:
-            salary_from (str or int or float): Нижняя граница оклада.
-            salary_to (str or int or float): Верхняя граница оклада.
-            salary_currency (str): Валюта оклада.
-         >>> Salary(10000,20000,'RUR').salary_rubles
-        15000.0
-        >>> Salary(10000,20000,'EUR').salary_from
-        599000.0
-        >>> Salary(10000,20000,'EUR').salary_to
-        1198000.0
-        >>> Salary(10000,20000,'RUR').salary_currency
-        'RUR'
+            vac_names (str or list): Профессия или список профессий введенных пользователем.
+            quantiles (float or None): Допустимая ошибка квантилей. None - квантили не считаются.
         """
+        self.index = NameIndex([vac_names] if isinstance(vac_names, str) else vac_names)
+        self.vac_names = self.index.professions
+        self.count = 0
+        self.years = {}
+        self.vac_years = {vac_name: {} for vac_name in self.vac_names}
+        self.cities = {}
+        self.quantiles = quantiles
+        self.sketches = None
+        if quantiles is not None:
+            self.sketches = {'years': {}, 'cities': {}, 'vac_years': {vac_name: {} for vac_name in self.vac_names}}
+        self.rejects = RejectReport()
+
+    def get_sketch(self, dic, key):
+        """Функция возвращает скетч по ключу, создавая его при необходимости.
 
-        self.salary_from = salary_from
-        self.salary_to = salary_to
-        self.salary_currency = salary_currency
-        self.salary_rubles = int((float(self.salary_from) + float(self.salary_to)) / 2) \
-                             * currency_to_rub[self.salary_currency]
-
-    def get_salary_rubles(self):
-        """ Функция предоставляет обработанные данные о зарплате при её вызове.
+        Args:
+            dic (dict): Словарь скетчей.
+            key (int or str): Год или город.
 
         Returns:
-            float: Средняя зарплата в рублях.
+            QuantileSketch: Скетч.
         """
-        return self.salary_rubles
+        sketch = dic.get(key)
+        if sketch is None:
+            sketch = dic[key] = QuantileSketch(self.quantiles)
+        return sketch
 
-class Vacancy:
-    """Класс для представления необходимых объектов вакансий.
+    @staticmethod
+    def add(dic, key, salary, count=1):
+        """Функция прибавляет зарплату к сумме и увеличивает счетчик по ключу.
 
-    Attributes:
-        name (str): Название вакансий.
-        salary (str or int or float): Зарплата.
-        area_name (str): Название региона.
-        published_at (str): Дата публикаций.
-    """
-    def __init__(self, name, salary, area_name, published_at):
-        """Инициализирует необходимые объекты name, salary, area_name, published_at и упускает ненужные объекты.
+        Args:
+            dic (dict): Словарь со списками [сумма, количество].
+            key (int or str): Год или город.
+            salary (float): Зарплата (или сумма зарплат) в рублях.
+            count (int): Количество вакансий.
+        """
+        pair = dic.get(key)
+        if pair is None:
+            dic[key] = [salary, count]
+        else:
+            pair[0] += salary
+            pair[1] += count
+
+    def update(self, vacancy):
+        """Функция учитывает одну вакансию в статистике. Вакансия с некорректной датой пропускается
+        и записывается в rejects.
 
         Args:
-            name (str): Название вакансии.
-            salary (str or int or float): Зарплата.
-            area_name (str): Название региона.
-            published_at (str): Дата публикаций.
+            vacancy (Vacancy): Вакансия.
         """
-        self.name = name
-        self.salary = salary
-        self.area_name = area_name
-        self.published_at = published_at
+        parsed = FieldParser.year_month(vacancy.published_at, self.rejects)
+        if parsed is None:
+            return
+        year = parsed[0]
+        salary = vacancy.salary.get_salary_rubles()
+        self.count += 1
+        matched = self.index.match(vacancy.name)
+        Statistic.add(self.years, year, salary)
+        for i in matched:
+            Statistic.add(self.vac_years[self.vac_names[i]], year, salary)
+        Statistic.add(self.cities, vacancy.area_name, salary)
+        if self.sketches is not None:
+            self.get_sketch(self.sketches['years'], year).update(salary)
+            for i in matched:
+                self.get_sketch(self.sketches['vac_years'][self.vac_names[i]], year).update(salary)
+            self.get_sketch(self.sketches['cities'], vacancy.area_name).update(salary)
+
+    def merge(self, other):
+        """Функция объединяет статистику, посчитанную по другой части данных.
+
+        Args:
+            other (Statistic): Частичная статистика.
+
+        Returns:
+            Statistic: Объединенная статистика.
+        """
+        self.count += other.count
+        self.rejects.merge(other.rejects)
+        pairs = [(self.years, other.years), (self.cities, other.cities)]
+        pairs += [(self.vac_years[vac_name], other.vac_years[vac_name]) for vac_name in self.vac_names]
+        for dic, other_dic in pairs:
+            for key, (salary, count) in other_dic.items():
+                Statistic.add(dic, key, salary, count)
+        if self.sketches is not None and other.sketches is not None:
+            pairs = [(self.sketches['years'], other.sketches['years']),
+                     (self.sketches['cities'], other.sketches['cities'])]
+            pairs += [(self.sketches['vac_years'][vac_name], other.sketches['vac_years'][vac_name])
+                      for vac_name in self.vac_names]
+            for dic, other_dic in pairs:
+                for key, sketch in other_dic.items():
+                    self.get_sketch(dic, key).merge(sketch)
+        return self
+
+    @staticmethod
+    def from_columns(vac_names, years, salaries, area_ids, areas, name_ids, names, quantiles=None):
+        """Функция собирает статистику по столбцам numpy без цикла по вакансиям: суммы и количества
+        считаются через np.bincount, а профессии ищутся один раз в каждом уникальном названии.
+
+        Args:
+            vac_names (str or list): Профессия или список профессий введенных пользователем.
+            years (ndarray): Годы публикации вакансий.
+            salaries (ndarray): Зарплаты в рублях.
+            area_ids (ndarray): Номера городов в списке areas.
+            areas (list): Уникальные названия городов в порядке появления.
+            name_ids (ndarray): Номера названий в списке names.
+            names (list): Уникальные названия вакансий.
+            quantiles (float or None): Допустимая ошибка квантилей. None - квантили не считаются.
 
-options = Interface()
-result = DataSet.test_data(options.parameter, options.parameter[2])
-Report.graphics(result, options.parameter[1])
-Report.generate_excel(result, options.parameter[1])
-Report.generate_pdf(result, options.parameter[1], heads1, heads2)
+        Returns:
+            Statistic: Статистика по столбцам.
+        """
+        statistic = Statistic(vac_names, quantiles)
+        statistic.count = len(years)
+        if statistic.count == 0:
+            return statistic
+        first_year = int(years.min())
+        offsets = years.astype(np.int64) - first_year
+        statistic.years = Statistic.group(offsets, salaries, first_year)
+        matched = np.zeros((len(statistic.vac_names), len(names)), dtype=bool)
+        for name_id, name in enumerate(names):
+            matched[list(statistic.index.match(name)), name_id] = True
+        for i, vac_name in enumerate(statistic.vac_names):
+            mask = matched[i][name_ids]
+            statistic.vac_years[vac_name] = Statistic.group(offsets[mask], salaries[mask], first_year)
+            if quantiles is not None:
+                statistic.sketches['vac_years'][vac_name] = statistic.group_sketches(offsets[mask], salaries[mask],
+                                                                                     first_year)
+        sums = np.bincount(area_ids, weights=salaries, minlength=len(areas)).tolist()
+        counts = np.bincount(area_ids, minlength=len(areas)).tolist()
+        statistic.cities = {area: [sums[i], counts[i]] for i, area in enumerate(areas) if counts[i] != 0}
+        if quantiles is not None:
+            statistic.sketches['years'] = statistic.group_sketches(offsets, salaries, first_year)
+            statistic.sketches['cities'] = {areas[i]: sketch for i, sketch in
+                                            statistic.group_sketches(area_ids, salaries, 0).items()}
+        return statistic
+
+    def group_sketches(self, ids, salaries, first_key):
+        """Функция строит скетчи зарплат по группам: значения сортируются по номеру группы и добавляются
+        в скетч группы одной порцией.
+
+        Args:
+            ids (ndarray): Номера групп (сдвиги ключа от first_key).
+            salaries (ndarray): Зарплаты в рублях.
+            first_key (int): Ключ группы с номером 0.
+
+        Returns:
+            dict: Словарь ключ - скетч только для групп с вакансиями.
+        """
+        order = np.argsort(ids, kind='stable')
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(ids))))
+        sorted_salaries = salaries[order]
+        sketches = {}
+        for i in range(len(bounds) - 1):
+            if bounds[i + 1] > bounds[i]:
+                sketches[first_key + i] = QuantileSketch(self.quantiles)
+                sketches[first_key + i].update_many(sorted_salaries[bounds[i]:bounds[i + 1]])
+        return sketches
+
+    @staticmethod
+    def group(offsets, salaries, first_key):
+        """Функция считает суммы зарплат и количества вакансий по сдвигам ключа от first_key.
+
+        Args:
+            offsets (ndarray): Сдвиги ключа (например, года) от first_key.
+            salaries (ndarray): Зарплаты в рублях.
+            first_key (int): Наименьший ключ.
+
+        Returns:
+            dict: Словарь ключ - [сумма, количество] только для ключей с вакансиями.
+        """
+        sums = np.bincount(offsets, weights=salaries).tolist()
+        counts = np.bincount(offsets).tolist()
+        return {first_key + i: [sums[i], count] for i, count in enumerate(counts) if count != 0}
+
+    def get_dicts(self, vac_name=None):
+        """Функция переводит накопленные суммы в шесть словарей статистики.
+
+        Args:
+            vac_name (str or None): Профессия из vac_names. None - первая профессия.
+
+        Returns:
+            tuple: Кортеж со словарями, в которых хранится статистика по csv-файлу.
+        """
+        if self.count == 0:
+            return {}, {}, {}, {}, {}, {}
+        years = list(range(min(self.years), max(self.years) + 1))
+        mean = lambda pair: int(pair[0] / pair[1])
+        vac_years = self.vac_years[self.vac_names[0] if vac_name is None else vac_name]
+
+        salary_by_years = {year: mean(self.years[year]) if year in self.years else 0 for year in years}
+        vac_salary_by_years = {year: mean(vac_years[year]) if year in vac_years else 0 for year in years}
+        vacs_by_years = {year: self.years[year][1] if year in self.years else 0 for year in years}
+        vac_counts_by_years = {year: vac_years[year][1] if year in vac_years else 0 for year in years}
+
+        area_name_list = [x for x in self.cities.items() if x[1][1] / self.count > 0.01]
+        area_name_list = sorted(area_name_list, key=lambda item: item[1][0] / item[1][1], reverse=True)
+        salary_by_cities = {item[0]: mean(item[1]) for item in area_name_list[0: min(len(area_name_list), 10)]}
+
+        vacs_counts = {x: round(y[1] / self.count, 4) for x, y in self.cities.items()}
+        vacs_counts = {k: val for k, val in vacs_counts.items() if val >= 0.01}
+        vacs_by_cities = dict(sorted(vacs_counts.items(), key=lambda item: item[1], reverse=True))
+        vacs_by_cities = dict(list(vacs_by_cities.items())[:10])
+        return salary_by_years, vac_salary_by_years, vacs_by_years, vac_counts_by_years, salary_by_cities, vacs_by_cities
+
+    def get_quantiles(self, vac_name=None, qs=(0.1, 0.5, 0.9)):
+        """Функция считает квантили зарплат (по умолчанию p10, медиану и p90) по годам, по годам для профессии
+        и по городам из словаря salary_by_cities.
+
+        Args:
+            vac_name (str or None): Профессия из vac_names. None - первая профессия.
+            qs (tuple): Доли от 0 до 1.
+
+        Returns:
+            tuple: Три словаря ключ - {доля: зарплата}.
+        """
+        if self.sketches is None:
+            raise ValueError('Статистика посчитана без квантилей')
+        salary_by_years, vac_salary_by_years, _, _, salary_by_cities, _ = self.get_dicts(vac_name)
+        vac_sketches = self.sketches['vac_years'][self.vac_names[0] if vac_name is None else vac_name]
+        empty = {q: None for q in qs}
+        by_years = {year: self.sketches['years'][year].quantiles(qs) if year in self.sketches['years'] else empty
+                    for year in salary_by_years}
+        vac_by_years = {year: vac_sketches[year].quantiles(qs) if year in vac_sketches else empty
+                        for year in vac_salary_by_years}
+        by_cities = {city: self.sketches['cities'][city].quantiles(qs) for city in salary_by_cities}
+        return by_years, vac_by_years, by_cities
+
+
+class SampleStatistic:
+    """Класс считает приблизительную статистику по выборке. При чтении всего файла из каждого года
+    случайно остается не больше size вакансий (reservoir sampling), а количество вакансий по годам считается
+    точно, и очистка строк и создание вакансий выполняются только для выборки. Строка учитывается, только
+    если ее зарплата переводится в рубли (см. converts), поэтому количества совпадают с Statistic. Для очень
+    больших файлов строки можно читать с случайных позиций в байтах, тогда выборка делается по всему файлу,
+    а не по годам, и количество вакансий оценивается. К каждому значению шести словарей считается 95%
+    доверительный интервал.
+
+    Attributes:
+        vac_names (list): Профессии без повторов.
+        size (int): Размер выборки одного года.
+        totals (dict): Количество вакансий по годам (при чтении с позиций - оценка).
+        samples (dict): Строки выборки по годам.
+        list_naming (list): Название столбцов csv-файла.
+        exact_totals (bool): Посчитаны ли количества по годам точно.
+        rejects (RejectReport): Некорректные значения строк.
+        numbers (dict): Исходное значение зарплаты - число или None, если значение не переводится.
+        rates (dict): Пара (исходная валюта, месяц) - есть ли курс валюты.
+    """
+    z = 1.96
+
+    def __init__(self, vac_names, size=1000, seed=0):
+        """Инициализирует пустую выборку.
+
+        Args:
+            vac_names (str or list): Профессия или список профессий.
+            size (int): Размер выборки одного года.
+            seed (int): Начальное значение генератора случайных чисел.
+        """
+        self.index = NameIndex([vac_names] if isinstance(vac_names, str) else vac_names)
+        self.vac_names = self.index.professions
+        self.size = size
+        self.random = random.Random(seed)
+        self.totals = {}
+        self.samples = {}
+        self.list_naming = None
+        self.exact_totals = True
+        self.data = None
+        self.rejects = RejectReport()
+        self.numbers = {}
+        self.rates = {}
+        self.salary_indexes = None
+
+    def number(self, value):
+        """Функция переводит исходное значение зарплаты в число так же, как Salary после очистки строки.
+
+        Args:
+            value (str): Значение ячейки.
+
+        Returns:
+            float or None: Число, None - значение не переводится.
+        """
+        if value not in self.numbers:
+            try:
+                self.numbers[value] = float(DataSet.cleaner_string(value))
+            except ValueError:
+                self.numbers[value] = None
+        return self.numbers[value]
+
+    def converts(self, line, month):
+        """Функция проверяет, переведет ли Salary зарплату строки в рубли, не очищая всю строку и не создавая
+        вакансию. Числа и наличие курса запоминаются по исходным значениям ячеек. Строку, которая не
+        переводится, записывает в rejects DataSet.rows_to_vacancies, как при чтении всего файла.
+
+        Args:
+            line (list): Строка csv-файла без пустых ячеек.
+            month (str): Месяц публикации 'YYYY-MM'.
+
+        Returns:
+            bool: Переводится ли зарплата.
+        """
+        if self.salary_indexes is None:
+            self.salary_indexes = [self.list_naming.index(column) for column in
+                                   ('salary_from', 'salary_to', 'salary_currency')]
+        i, j, k = self.salary_indexes
+        low, high, currency = self.numbers.get(line[i], False), self.numbers.get(line[j], False), line[k]
+        if low is False or high is False:
+            low, high = self.number(line[i]), self.number(line[j])
+        known = self.rates.get((currency, month))
+        if known is None:
+            known = Salary.find_rate(DataSet.cleaner_string(currency), month) is not None
+            self.rates[currency, month] = known
+        valid = low is not None and high is not None and math.isfinite((low + high) / 2) and known
+        if not valid:
+            for _ in DataSet.rows_to_vacancies([line], self.list_naming, rejects=self.rejects):
+                pass
+        return valid
+
+    def offer(self, year, line):
+        """Функция предлагает строку в выборку года: k-я строка года остается с вероятностью size / k.
+
+        Args:
+            year (int): Год публикации.
+            line (list): Строка csv-файла.
+        """
+        seen = self.totals[year] = self.totals.get(year, 0) + 1
+        sample = self.samples.setdefault(year, [])
+        if len(sample) < self.size:
+            sample.append(line)
+        else:
+            j = self.random.randrange(seen)
+            if j < self.size:
+                sample[j] = line
+
+    @staticmethod
+    def from_stream(file_name, vac_names, size=1000, seed=0):
+        """Функция делает выборку за один проход по файлу. Строки только разбираются модулем csv,
+        очищаются и переводятся в вакансии только попавшие в выборку.
+
+        Args:
+            file_name (str): Название csv-файла, можно сжатого.
+            vac_names (str or list): Профессия или список профессий.
+            size (int): Размер выборки одного года.
+            seed (int): Начальное значение генератора случайных чисел.
+
+        Returns:
+            SampleStatistic: Выборка.
+        """
+        statistic = SampleStatistic(vac_names, size, seed)
+        with open_file(file_name, encoding="utf_8_sig") as file:
+            text = csv.reader(file)
+            statistic.list_naming = next(text, None)
+            if statistic.list_naming is None:
+                print("Пустой файл")
+                exit()
+            width, date = len(statistic.list_naming), statistic.list_naming.index('published_at')
+            for line in text:
+                if len(line) == width and '' not in line:
+                    parsed = FieldParser.year_month(DataSet.cleaner_string(line[date]), statistic.rejects)
+                    if parsed is not None and statistic.converts(line, parsed[1]):
+                        statistic.offer(parsed[0], line)
+        return statistic
+
+    @staticmethod
+    def from_offsets(file_name, vac_names, size=1000, seed=0, seeks=None, rows_per_seek=8, block_size=1 << 16):
+        """Функция делает выборку по всему файлу, читая по несколько строк с случайных позиций. Позиции не
+        делятся по годам, поэтому редкие годы получают мало строк или ни одной. После позиции пропускается
+        неполная строка, а строки с неверным количеством ячеек или датой отбрасываются. Количество вакансий
+        оценивается по среднему размеру строки в байтах.
+
+        Args:
+            file_name (str): Название несжатого csv-файла.
+            vac_names (str or list): Профессия или список профессий.
+            size (int): По нему выбирается количество позиций: size * 4 на весь файл.
+            seed (int): Начальное значение генератора случайных чисел.
+            seeks (int or None): Количество позиций. None - size * 4.
+            rows_per_seek (int): Сколько строк читать с одной позиции.
+            block_size (int): Сколько байтов читать с одной позиции.
+
+        Returns:
+            SampleStatistic: Выборка.
+        """
+        if is_compressed(file_name):
+            raise ValueError('Чтение с случайных позиций возможно только для несжатого файла')
+        statistic = SampleStatistic(vac_names, size, seed)
+        statistic.exact_totals = False
+        file_size = os.path.getsize(file_name)
+        records = valid = consumed = 0
+        rows = []
+        with open(file_name, 'rb') as file:
+            statistic.list_naming = next(csv.reader([file.readline().decode('utf_8_sig')]), None)
+            if statistic.list_naming is None:
+                print("Пустой файл")
+                exit()
+            start = file.tell()
+            width, date = len(statistic.list_naming), statistic.list_naming.index('published_at')
+            for _ in range(seeks or size * 4):
+                file.seek(statistic.random.randrange(start, max(start + 1, file_size)))
+                lines = file.read(block_size).split(b'\n')[1:-1]
+                position = 0
+
+                def decoded():
+                    nonlocal position
+                    for line in lines:
+                        position += len(line) + 1
+                        yield line.decode('utf_8', 'replace')
+
+                seek_records, seek_position = 0, 0
+                for line in itertools.islice(csv.reader(decoded()), rows_per_seek):
+                    if len(line) != width or not date_pattern.match(line[date].strip()):
+                        continue
+                    seek_records += 1
+                    seek_position = position
+                    if '' not in line:
+                        parsed = FieldParser.year_month(DataSet.cleaner_string(line[date]), statistic.rejects)
+                        if parsed is not None and statistic.converts(line, parsed[1]):
+                            valid += 1
+                            rows.append((parsed[0], line))
+                records += seek_records
+                consumed += seek_position
+        total = (file_size - start) * records / consumed if consumed else 0
+        for year, line in rows:
+            statistic.samples.setdefault(year, []).append(line)
+        statistic.totals = {year: total * len(sample) / records for year, sample in statistic.samples.items()}
+        return statistic
+
+    def get_data(self):
+        """Функция переводит строки выборки в вакансии и запоминает зарплату, город и профессии.
+
+        Returns:
+            dict: Словарь год - список (зарплата, город, номера профессий).
+        """
+        if self.data is None:
+            self.data = {}
+            for year, sample in sorted(self.samples.items()):
+                rows = [(vacancy.salary.get_salary_rubles(), vacancy.area_name, set(self.index.match(vacancy.name)))
+                        for vacancy in DataSet.rows_to_vacancies(sample, self.list_naming, rejects=self.rejects)]
+                if rows:
+                    self.data[year] = rows
+        return self.data
+
+    def get_statistic(self):
+        """Функция строит Statistic, в котором каждая вакансия выборки весит totals[год] / размер выборки года.
+
+        Returns:
+            Statistic: Взвешенная статистика.
+        """
+        statistic = Statistic(self.vac_names)
+        for year, rows in self.get_data().items():
+            weight = self.totals.get(year, 0) / len(rows)
+            for salary, area_name, matched in rows:
+                Statistic.add(statistic.years, year, salary * weight, weight)
+                for i in matched:
+                    Statistic.add(statistic.vac_years[self.vac_names[i]], year, salary * weight, weight)
+                Statistic.add(statistic.cities, area_name, salary * weight, weight)
+                statistic.count += weight
+        return statistic
+
+    def get_dicts(self, vac_name=None):
+        """Функция считает шесть словарей статистики теми же правилами, что и Statistic.get_dicts.
+
+        Args:
+            vac_name (str or None): Профессия из vac_names. None - первая профессия.
+
+        Returns:
+            tuple: Кортеж со словарями приблизительной статистики.
+        """
+        dicts = self.get_statistic().get_dicts(vac_name)
+        for i in (2, 3):
+            dicts[i].update({year: round(count) for year, count in dicts[i].items()})
+        return dicts
+
+    @staticmethod
+    def mean_interval(values, population=None):
+        """Функция считает доверительный интервал среднего.
+
+        Args:
+            values (list): Значения выборки.
+            population (float or None): Размер генеральной совокупности для поправки на конечность.
+
+        Returns:
+            tuple or None: Нижняя и верхняя граница, None для выборки меньше двух значений.
+        """
+        n = len(values)
+        if n < 2:
+            return None
+        mean = sum(values) / n
+        error = math.sqrt(sum((value - mean) ** 2 for value in values) / (n - 1) / n)
+        if population:
+            error *= math.sqrt(max(0.0, 1 - n / population))
+        return int(mean - SampleStatistic.z * error), int(mean + SampleStatistic.z * error)
+
+    def get_intervals(self, vac_name=None):
+        """Функция считает 95% доверительные интервалы ко всем значениям шести словарей.
+
+        Args:
+            vac_name (str or None): Профессия из vac_names. None - первая профессия.
+
+        Returns:
+            tuple: Шесть словарей ключ - (нижняя граница, верхняя граница) или None.
+        """
+        dicts = self.get_dicts(vac_name)
+        profession = self.vac_names.index(self.vac_names[0] if vac_name is None else vac_name)
+        data, z = self.get_data(), SampleStatistic.z
+        total = sum(self.totals.values())
+        population = lambda year: self.totals.get(year, 0) if self.exact_totals else None
+        intervals = tuple({} for _ in dicts)
+        for year in dicts[0]:
+            rows = data.get(year, [])
+            intervals[0][year] = SampleStatistic.mean_interval([row[0] for row in rows], population(year))
+            intervals[1][year] = SampleStatistic.mean_interval([row[0] for row in rows if profession in row[2]],
+                                                               population(year))
+            n, count = len(rows), self.totals.get(year, 0)
+            share = sum(profession in row[2] for row in rows) / n if n else 0
+            correction = math.sqrt(max(0.0, 1 - n / count)) if self.exact_totals and count else 1
+            if self.exact_totals:
+                intervals[2][year] = (count, count)
+            else:
+                error = z * math.sqrt(count / total * (1 - count / total) / sum(map(len, data.values()))) * total
+                intervals[2][year] = (max(0, round(count - error)), round(count + error))
+            error = z * count * math.sqrt(share * (1 - share) / n) * correction if n else 0
+            intervals[3][year] = (max(0, round(count * share - error)), round(count * share + error))
+        for city in dicts[4]:
+            weighted = [(self.totals.get(year, 0) / len(rows), row[0]) for year, rows in data.items() for row in rows
+                        if row[1] == city]
+            weights = sum(weight for weight, salary in weighted)
+            mean = sum(weight * salary for weight, salary in weighted) / weights
+            error = z * math.sqrt(sum((weight * (salary - mean)) ** 2 for weight, salary in weighted)) / weights
+            intervals[4][city] = (int(mean - error), int(mean + error))
+        for city in dicts[5]:
+            variance = 0
+            for year, rows in data.items():
+                share = sum(row[1] == city for row in rows) / len(rows)
+                variance += (self.totals.get(year, 0) / total) ** 2 * share * (1 - share) / len(rows)
+            error = z * math.sqrt(variance)
+            intervals[5][city] = (round(max(0.0, dicts[5][city] - error), 4), round(dicts[5][city] + error, 4))
+        return intervals
+
+
+class DataSet:
+    """ Класс для получения обработанных данных csv-файла в удобном формате.
+
+    Attributes:
+        file_name (str): Введеная пользователем название csv-файла, полученная функций get_parameters.
+    """
+    def __init__(self, file_name):
+        """ Инициализация объекта file_name, и полученного обработаного списка вакансий vacancies_objects.
+
+        Args:
+            file_name (str): Введеная пользователем название csv-файла, полученная функций get_parameters.
+            vacancies_objects (VacancyTable): Обработанная таблица вакансий.
+        """
+        self.file_name = file_name
+        self.vacancies_objects = VacancyTable.from_csv(file_name)
+
+    @staticmethod
+    def cleaner_string(text):
+        """ Функция очищает строку от html-тегов и заменяет \n (знак табуляций - перенос строки) на пробел.
+
+        Args:
+             text (str): Строка из вакансий проходящая фильтрация.
+
+        Returns:
+            str: Очищенная строка.
+
+        >>> DataSet.cleaner_string('<h>Head</h>')
+        'Head'
+        >>> DataSet.cleaner_string('<h>Head    res</h>')
+        'Head res'
+        >>> DataSet.cleaner_string(' <h> Head res</h> ')
+        'Head res'
+        """
+        if '<' in text:
+            text = tag_pattern.sub("", text)
+        text = " ".join(text.split())
+        return text
+
+    @staticmethod
+    def csv_filter(file_name):
+        """ Обрабатывает список с вакансиями, оставляя необходимые объекты, и чистит вакансий с пустыми ячейками.
+
+        Args:
+            file_name (str): Введеная пользователем название csv-файла, полученная функций get_parameters.
+
+        Returns:
+            list: Обработаные и отфильтрованые вакансий от html-тегов (благодаря функций cleaner_string).
+        """
+        return list(DataSet.csv_stream(file_name, None))
+
+    @staticmethod
+    def csv_stream(file_name, columns=report_columns, rejects=None):
+        """ Построчно читает csv-файл и по одной отдает обработанные вакансии, не загружая файл в память целиком.
+        Очищаются только столбцы из columns, повторяющиеся названия городов и валют хранятся в одном экземпляре.
+
+        Args:
+            file_name (str): Введеная пользователем название csv-файла, полученная функций get_parameters.
+            columns (tuple or None): Столбцы, необходимые для статистики. None - очищать все столбцы.
+            rejects (RejectReport or None): Отчет для строк с некорректной зарплатой (см. rows_to_vacancies).
+
+        Yields:
+            Vacancy: Вакансия без пустых ячеек, очищенная от html-тегов.
+        """
+        with open_file(file_name, encoding="utf_8_sig") as file:
+            text = csv.reader(file)
+            list_naming = next(text, None)
+            if list_naming is None:
+                print("Пустой файл")
+                exit()
+            yield from DataSet.rows_to_vacancies(text, list_naming, columns, rejects)
+
+    @staticmethod
+    def rows_to_vacancies(rows, list_naming, columns=report_columns, rejects=None):
+        """ Превращает строки csv-файла в вакансии, пропуская строки с пустыми ячейками.
+
+        Args:
+            rows (iterable): Строки csv-файла в виде списков.
+            list_naming (list): Название столбцов csv-файла.
+            columns (tuple or None): Столбцы, необходимые для статистики. None - очищать все столбцы.
+            rejects (RejectReport or None): Отчет, в который записываются строки с некорректной зарплатой или
+                валютой вместо исключения. None - исключение как у Salary.
+
+        Yields:
+            Vacancy: Вакансия без пустых ячеек, очищенная от html-тегов.
+        """
+        if columns is None:
+            columns = list_naming
+        indexes = [(column, list_naming.index(column), column in intern_columns) for column in columns]
+        rows_in = rows_rejected = 0
+        try:
+            for line in rows:
+                rows_in += 1
+                if len(line) != len(list_naming) or '' in line:
+                    rows_rejected += 1
+                    continue
+                dic_changed_vacancies = {}
+                for column, i, is_interned in indexes:
+                    value = DataSet.cleaner_string(line[i])
+                    dic_changed_vacancies[column] = sys.intern(value) if is_interned else value
+                try:
+                    salary = Salary(dic_changed_vacancies['salary_from'], dic_changed_vacancies['salary_to'],
+                                    dic_changed_vacancies['salary_currency'], dic_changed_vacancies['published_at'][:7])
+                except (ValueError, KeyError, OverflowError) as error:
+                    if rejects is None:
+                        raise
+                    rows_rejected += 1
+                    if isinstance(error, KeyError):
+                        rejects.add('salary_currency', dic_changed_vacancies['salary_currency'], 'неизвестная валюта')
+                    else:
+                        rejects.add('salary_from', f"{dic_changed_vacancies['salary_from']}-"
+                                                   f"{dic_changed_vacancies['salary_to']}", str(error))
+                    continue
+                yield Vacancy(dic_changed_vacancies['name'], salary, dic_changed_vacancies['area_name'],
+                              dic_changed_vacancies['published_at'])
+        finally:
+            profiler.count('csv_filter', rows_in, rows_rejected, rows_in - rows_rejected)
+
+    @staticmethod
+    def byte_ranges(file_name, parts, min_range=1 << 20):
+        """ Делит csv-файл на диапазоны байтов, которые начинаются с новой записи. Перевод строки внутри
+        ячейки в кавычках не считается границей: внутри кавычек находится позиция, перед которой нечетное
+        число символов '"'.
+
+        Args:
+            file_name (str): Название csv-файла.
+            parts (int): Желаемое количество диапазонов.
+            min_range (int): Минимальный размер одного диапазона в байтах.
+
+        Returns:
+            tuple: Название столбцов csv-файла и список пар (начало, конец) диапазонов.
+        """
+        size = os.path.getsize(file_name)
+        block_size = 1 << 20
+        with open(file_name, 'rb') as file:
+            list_naming = next(csv.reader([file.readline().decode('utf_8_sig')]), None)
+            if list_naming is None:
+                print("Пустой файл")
+                exit()
+            start = file.tell()
+            parts = max(1, min(parts, (size - start) // min_range))
+            bounds = [start]
+            position, quotes = start, 0
+            for k in range(1, parts):
+                target = start + (size - start) * k // parts
+                while position < target:
+                    block = file.read(min(block_size, target - position))
+                    quotes += block.count(b'"')
+                    position += len(block)
+                while position < size:
+                    block = file.read(block_size)
+                    index = 0
+                    newline = block.find(b'\n')
+                    while newline != -1:
+                        quotes += block.count(b'"', index, newline)
+                        index = newline + 1
+                        if quotes % 2 == 0:
+                            break
+                        newline = block.find(b'\n', index)
+                    if newline != -1:
+                        position += index
+                        file.seek(position)
+                        break
+                    quotes += block.count(b'"', index)
+                    position += len(block)
+                if position > bounds[-1]:
+                    bounds.append(position)
+            bounds.append(size)
+        return list_naming, [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+    @staticmethod
+    def range_lines(file_name, start, end):
+        """ Построчно читает диапазон байтов csv-файла.
+
+        Args:
+            file_name (str): Название csv-файла.
+            start (int): Начало диапазона.
+            end (int): Конец диапазона.
+
+        Yields:
+            str: Строка файла.
+        """
+        with open(file_name, 'rb') as file:
+            file.seek(start)
+            position = start
+            for line in file:
+                if position >= end:
+                    break
+                position += len(line)
+                yield line.decode('utf_8')
+
+    @staticmethod
+    def range_statistic(args):
+        """ Считает частичную статистику по одному диапазону байтов csv-файла. Запускается в отдельном процессе.
+
+        Args:
+            args (tuple): Название файла, название столбцов, начало и конец диапазона, профессии, ошибка квантилей,
+                курсы по месяцам (Salary.monthly_rates) и включены ли замеры.
+
+        Returns:
+            tuple: Частичная статистика по диапазону и замеры этапов задачи для profiler.merge.
+        """
+        file_name, list_naming, start, end, vac_name, quantiles, monthly_rates, profile = args
+        Salary.set_monthly_rates(monthly_rates)
+        with profiler.task(profile) as stages:
+            statistic = Statistic(vac_name, quantiles)
+            rows = csv.reader(DataSet.range_lines(file_name, start, end))
+            for vacancy in DataSet.rows_to_vacancies(rows, list_naming, rejects=statistic.rejects):
+                statistic.update(vacancy)
+        return statistic, stages
+
+    @staticmethod
+    def parallel_statistic(file_name, vac_name, workers=None, min_range=1 << 20, quantiles=None):
+        """ Делит один csv-файл на диапазоны байтов, считает по ним статистику в отдельных процессах и
+        объединяет частичные результаты.
+
+        Args:
+            file_name (str): Название csv-файла.
+            vac_name (str or list): Профессия или список профессий.
+            workers (int or None): Количество процессов. None - по количеству ядер.
+            min_range (int): Минимальный размер одного диапазона в байтах.
+            quantiles (float or None): Допустимая ошибка квантилей. None - квантили не считаются.
+
+        Returns:
+            Statistic: Статистика по всему файлу.
+        """
+        workers = workers or os.cpu_count() or 1
+        list_naming, ranges = DataSet.byte_ranges(file_name, workers, min_range)
+        tasks = [(file_name, list_naming, start, end, vac_name, quantiles, Salary.monthly_rates, profiler.enabled)
+                 for start, end in ranges]
+        statistic = Statistic(vac_name, quantiles)
+        if len(tasks) <= 1:
+            parts = [DataSet.range_statistic(task) for task in tasks]
+        else:
+            with cf.ProcessPoolExecutor(min(workers, len(tasks))) as executor:
+                parts = list(executor.map(DataSet.range_statistic, tasks))
+        for part, stages in parts:
+            statistic.merge(part)
+            profiler.merge(stages)
+        return statistic
+
+    @staticmethod
+    def csv_reader(file_name):
+        # Функция открывает и преобразовывает csv формат.
+
+        # Args:
+            # file_name (str): Введеная пользователем название csv-файла, полученная функций get_parameters.
+
+        #Returns:
+            # list (list_naming): Название столбцов csv-файла.
+            # list (vacancies): Список списков всех вакансий csv-файла.
+
+       with open_file(file_name, encoding="utf_8_sig") as file:
+            text = csv.reader(file)
+            data = [x for x in text]
+            if len(data) == 0:
+                print("Пустой файл")
+                exit()
+            list_naming = data[0]
+            vacancies = data[1:]
+            return list_naming, vacancies
+
+
+    @staticmethod
+    def get_statistic(file_name, vac_names, workers=1, cache=False, quantiles=None):
+        """Функция считает статистику по csv-файлу за один проход для одной или нескольких профессий.
+
+        Args:
+            file_name (str): Название csv-файла.
+            vac_names (str or list): Профессия или список профессий.
+            workers (int or None): Количество процессов для чтения файла. None - по количеству ядер. Сжатый
+                файл нельзя разделить на диапазоны байтов, поэтому он всегда читается в одном процессе.
+            cache (bool): Читать вакансии из бинарного кэша рядом с csv-файлом, кэш собирается в workers процессах.
+            quantiles (float or None): Допустимая ошибка квантилей. None - квантили не считаются.
+
+        Returns:
+            Statistic: Статистика по всему файлу.
+        """
+        with profiler.stage('statistic'):
+            if cache:
+                with profiler.stage('cache_load'):
+                    table = VacancyCache.load(file_name, workers)
+                return table.get_statistic(vac_names, quantiles)
+            if workers == 1 or is_compressed(file_name):
+                statistic = Statistic(vac_names, quantiles)
+                for vacancy in DataSet.csv_stream(file_name, rejects=statistic.rejects):
+                    statistic.update(vacancy)
+                return statistic
+            return DataSet.parallel_statistic(file_name, vac_names, workers, quantiles=quantiles)
+
+    @staticmethod
+    def professions_data(file_name, vac_names, workers=1, cache=False):
+        """Функция считает шесть словарей статистики для каждой профессии из списка за один проход.
+
+        Args:
+            file_name (str): Название csv-файла.
+            vac_names (list): Список профессий.
+            workers (int or None): Количество процессов для чтения файла. None - по количеству ядер.
+            cache (bool): Читать вакансии из бинарного кэша рядом с csv-файлом.
+
+        Returns:
+            dict: Словарь профессия - кортеж со словарями статистики.
+        """
+        statistic = DataSet.get_statistic(file_name, vac_names, workers, cache)
+        return {vac_name: statistic.get_dicts(vac_name) for vac_name in statistic.vac_names}
+
+    @staticmethod
+    def test_data(arg, method, workers=1, cache=False, sample=None, seek=False, quantiles=None):
+        """Функция проверяет файл на пустоту.
+
+        Args:
+            arg(tuple): Содержит данные веденные пользователем.
+            method(str): Пользовательский метод изображения результатов.
+            workers(int or None): Количество процессов для чтения файла. None - по количеству ядер.
+            cache(bool): Читать вакансии из бинарного кэша рядом с csv-файлом.
+            sample(int or None): Размер выборки одного года для приблизительной статистики. None - весь файл.
+            seek(bool): Делать выборку чтением с случайных позиций файла, а не за один проход. Такая выборка
+                делается по всему файлу (sample * 4 позиций), а не по годам.
+            quantiles(float or None): Допустимая ошибка квантилей, квантили зарплат печатаются перед статистикой.
+                None - квантили не считаются. Для выборки квантили не считаются.
+
+        Returns:
+            tuple: Кортеж с полностью обработанными словарями.
+        """
+        if arg is None:
+            return None
+        if sample:
+            statistic = SampleStatistic.from_offsets(arg[0], arg[1], sample) if seek else \
+                SampleStatistic.from_stream(arg[0], arg[1], sample)
+            intervals = statistic.get_intervals()
+        else:
+            statistic = DataSet.get_statistic(arg[0], arg[1], workers, cache, quantiles)
+            intervals = None
+        dicts = statistic.get_dicts()
+        # Отчеты печатаются до вывода: output_data завершает программу после вывода таблицы вакансий
+        if statistic.rejects:
+            print(statistic.rejects)
+        if quantiles is not None and not sample:
+            Interface.output_quantiles(statistic.get_quantiles())
+        return Interface.output_data(dicts, method, intervals)
+
+
+class Salary:
+    """ Класс для представления зарплаты.
+
+    Attributes:
+        salary_from (int): Нижняя граница оклада.
+        salary_to (int): Верхняя граница оклада.
+        salary_currency (str): Валюта оклада.
+    """
+    monthly_rates = None
+    monthly_rates_key = None
+
+    def __init__(self, salary_from, salary_to, salary_currency, month=None):
+        """ Инициализирует объект Salary, выполняет конвертацию для целочисленных полей. Вычисляет среднюю зарплату
+        из вилки и переводить в рубли, при помощи словоря - currency_to_rub.
+
+        Args:
+            salary_from (str or int or float): Нижняя граница оклада.
+            salary_to (str or int or float): Верхняя граница оклада.
+            salary_currency (str): Валюта оклада.
+            month (str or None): Месяц публикации 'YYYY-MM' для курса из хранилища курсов (см. get_rate).
+         >>> Salary(10000,20000,'RUR').salary_rubles
+        15000.0
+        >>> Salary(10000,20000,'EUR').salary_from
+        599000.0
+        >>> Salary(10000,20000,'EUR').salary_to
+        1198000.0
+        >>> Salary(10000,20000,'RUR').salary_currency
+        'RUR'
+        """
+
+        self.salary_from = salary_from
+        self.salary_to = salary_to
+        self.salary_currency = salary_currency
+        self.salary_rubles = int((float(self.salary_from) + float(self.salary_to)) / 2) \
+                             * Salary.get_rate(self.salary_currency, month)
+
+    @staticmethod
+    def find_rate(currency, month=None):
+        """ Функция ищет курс валюты: курс ЦБ РФ за месяц публикации, если курсы загружены через
+        use_currency_rates и месяц в них есть, иначе курс из currency_to_rub.
+
+        Args:
+            currency (str): Валюта оклада.
+            month (str or None): Месяц публикации 'YYYY-MM'.
+
+        Returns:
+            float or None: Курс к рублю, None - неизвестная валюта.
+        """
+        if Salary.monthly_rates is not None:
+            rate = Salary.monthly_rates.get(month, {}).get(currency)
+            if rate is not None:
+                return rate
+        return currency_to_rub.get(currency)
+
+    @staticmethod
+    def get_rate(currency, month=None):
+        """ Функция возвращает курс валюты как find_rate.
+
+        Args:
+            currency (str): Валюта оклада.
+            month (str or None): Месяц публикации 'YYYY-MM'.
+
+        Returns:
+            float: Курс к рублю.
+        """
+        rate = Salary.find_rate(currency, month)
+        if rate is None:
+            raise KeyError(currency)
+        return rate
+
+    @staticmethod
+    def set_monthly_rates(table):
+        """ Функция задает курсы по месяцам для перевода зарплат в рубли.
+
+        Args:
+            table (dict or None): Словарь месяц - {валюта: курс}, как CurrencyRates.get_table. None - только
+                currency_to_rub.
+        """
+        Salary.monthly_rates = table
+        Salary.monthly_rates_key = None if table is None else hashlib.blake2b(
+            json.dumps(table, sort_keys=True).encode('utf_8'), digest_size=16).hexdigest()
+
+    @staticmethod
+    def use_currency_rates(db_name='currency_rates.sqlite', first=None, last=None):
+        """ Функция загружает курсы ЦБ РФ по месяцам из общего хранилища курсов (currency_rates.CurrencyRates).
+
+        Args:
+            db_name (str): Название sqlite-файла с курсами.
+            first (str or None): Первый месяц 'YYYY-MM'. Если указан, недостающие месяцы скачиваются.
+            last (str or None): Последний месяц 'YYYY-MM'.
+        """
+        from currency_rates import CurrencyRates
+        Salary.set_monthly_rates(CurrencyRates(db_name).get_table(first, last))
+
+    def get_salary_rubles(self):
+        """ Функция предоставляет обработанные данные о зарплате при её вызове.
+
+        Returns:
+            float: Средняя зарплата в рублях.
+        """
+        return self.salary_rubles
+
+class Vacancy:
+    """Класс для представления необходимых объектов вакансий.
+
+    Attributes:
+        name (str): Название вакансий.
+        salary (str or int or float): Зарплата.
+        area_name (str): Название региона.
+        published_at (str): Дата публикаций.
+    """
+    def __init__(self, name, salary, area_name, published_at):
+        """Инициализирует необходимые объекты name, salary, area_name, published_at и упускает ненужные объекты.
+
+        Args:
+            name (str): Название вакансии.
+            salary (str or int or float): Зарплата.
+            area_name (str): Название региона.
+            published_at (str): Дата публикаций.
+        """
+        self.name = name
+        self.salary = salary
+        self.area_name = area_name
+        self.published_at = published_at
+
+
+class VacancyTable:
+    """Класс хранит вакансии по столбцам в массивах numpy вместо отдельных объектов Vacancy и Salary.
+    Строковые столбцы name, area_name и salary_currency хранятся номерами в списках уникальных значений.
+
+    Attributes:
+        columns (dict): Столбцы таблицы (см. column_types).
+        currencies (list): Уникальные валюты.
+        areas (list): Уникальные города в порядке появления.
+        names (list): Уникальные названия вакансий.
+        rejects (RejectReport): Некорректные значения пропущенных вакансий.
+    """
+    column_types = {'years': 'int16', 'salaries_rub': 'float64', 'salary_from': 'float64', 'salary_to': 'float64',
+                    'currency_ids': 'uint16', 'area_ids': 'int32', 'name_ids': 'int32', 'published_at': 'S32'}
+
+    def __init__(self, columns, currencies, areas, names, rejects=None):
+        """Инициализирует таблицу по столбцам и спискам уникальных значений.
+
+        Args:
+            columns (dict): Столбцы таблицы (см. column_types).
+            currencies (list): Уникальные валюты.
+            areas (list): Уникальные города в порядке появления.
+            names (list): Уникальные названия вакансий.
+            rejects (RejectReport or None): Некорректные значения пропущенных вакансий.
+        """
+        self.columns = columns
+        self.currencies = currencies
+        self.areas = areas
+        self.names = names
+        self.rejects = RejectReport() if rejects is None else rejects
+
+    @staticmethod
+    def empty_buffers():
+        """Функция создает пустые буферы, в которые from_vacancies и from_rows дописывают строки таблицы.
+
+        Returns:
+            tuple: Столбцы (array), даты публикации (bytearray) и словари уникальных значений.
+        """
+        columns = {'years': array('h'), 'salaries_rub': array('d'), 'salary_from': array('d'), 'salary_to': array('d'),
+                   'currency_ids': array('H'), 'area_ids': array('i'), 'name_ids': array('i')}
+        return columns, bytearray(), {'currency_ids': {}, 'area_ids': {}, 'name_ids': {}}
+
+    @staticmethod
+    def check_dictionaries(dictionaries):
+        """Функция проверяет, что номера уникальных значений строковых столбцов помещаются в тип столбца
+        (column_types). Иначе номера молча переполнились бы при переводе в numpy.
+
+        Args:
+            dictionaries (dict): Словари уникальных значений строковых столбцов.
+        """
+        for column, ids in dictionaries.items():
+            limit = np.iinfo(VacancyTable.column_types[column]).max + 1
+            if len(ids) > limit:
+                raise ValueError(f'Слишком много разных значений в столбце {column}: {len(ids)}, '
+                                 f'тип {VacancyTable.column_types[column]} вмещает {limit}')
+
+    @staticmethod
+    def from_buffers(columns, published_at, dictionaries, rejects):
+        """Функция превращает заполненные буферы в таблицу без копирования данных.
+
+        Args:
+            columns (dict): Столбцы (array).
+            published_at (bytearray): Даты публикации фиксированной ширины.
+            dictionaries (dict): Словари уникальных значений строковых столбцов.
+            rejects (RejectReport): Некорректные значения пропущенных вакансий.
+
+        Returns:
+            VacancyTable: Таблица вакансий.
+        """
+        VacancyTable.check_dictionaries(dictionaries)
+        columns = {column: np.frombuffer(values, dtype=VacancyTable.column_types[column]) if len(values) else
+                   np.empty(0, dtype=VacancyTable.column_types[column]) for column, values in columns.items()}
+        columns['published_at'] = np.frombuffer(bytes(published_at), dtype=VacancyTable.column_types['published_at'])
+        return VacancyTable(columns, list(dictionaries['currency_ids']), list(dictionaries['area_ids']),
+                            list(dictionaries['name_ids']), rejects)
+
+    @staticmethod
+    def from_vacancies(vacancies):
+        """Функция собирает таблицу из вакансий за один проход, не храня объекты Vacancy.
+        Вакансии с некорректной датой пропускаются и записываются в rejects таблицы.
+
+        Args:
+            vacancies (iterable): Вакансии, например из DataSet.csv_stream.
+
+        Returns:
+            VacancyTable: Таблица вакансий.
+        """
+        columns, published_at, dictionaries = VacancyTable.empty_buffers()
+        width = np.dtype(VacancyTable.column_types['published_at']).itemsize
+        rejects = RejectReport()
+        for vacancy in vacancies:
+            parsed = FieldParser.year_month(vacancy.published_at, rejects)
+            if parsed is None:
+                continue
+            columns['years'].append(parsed[0])
+            columns['salaries_rub'].append(vacancy.salary.get_salary_rubles())
+            columns['salary_from'].append(float(vacancy.salary.salary_from))
+            columns['salary_to'].append(float(vacancy.salary.salary_to))
+            for column, value in (('currency_ids', vacancy.salary.salary_currency), ('area_ids', vacancy.area_name),
+                                  ('name_ids', vacancy.name)):
+                ids = dictionaries[column]
+                columns[column].append(ids.setdefault(value, len(ids)))
+            published_at += vacancy.published_at.encode()[:width].ljust(width, b'\0')
+        return VacancyTable.from_buffers(columns, published_at, dictionaries, rejects)
+
+    @staticmethod
+    def append_chunk(columns, published_at, dictionaries, chunk, rejects):
+        """Функция переводит очищенные ячейки части файла и дописывает их в буферы таблицы: зарплаты
+        переводятся в числа и в рубли сразу для всей части (FieldParser.salaries), а год берется из словаря
+        дат FieldParser. Строки с некорректной датой, зарплатой или валютой записываются в rejects.
+
+        Args:
+            columns (dict): Столбцы (array).
+            published_at (bytearray): Даты публикации фиксированной ширины.
+            dictionaries (dict): Словари уникальных значений строковых столбцов.
+            chunk (list): Списки очищенных ячеек в порядке report_columns.
+            rejects (RejectReport): Отчет для некорректных значений.
+        """
+        names, salary_from, salary_to, currencies, areas, dates = chunk
+        salary_from, salary_to, salaries_rub, valid = FieldParser.salaries(
+            salary_from, salary_to, currencies, Salary.find_rate, rejects, [date[:7] for date in dates])
+        for i, value in enumerate(dates):
+            if valid[i]:
+                parsed = FieldParser.year_month(value, rejects)
+                if parsed is None:
+                    valid[i] = False
+                else:
+                    columns['years'].append(parsed[0])
+        for column, values in (('salaries_rub', salaries_rub), ('salary_from', salary_from), ('salary_to', salary_to)):
+            columns[column].frombytes(values[valid].tobytes())
+        for column, values in (('currency_ids', currencies), ('area_ids', areas), ('name_ids', names)):
+            ids = dictionaries[column]
+            columns[column].extend(ids.setdefault(value, len(ids)) for value, is_valid in zip(values, valid)
+                                   if is_valid)
+        width = np.dtype(VacancyTable.column_types['published_at']).itemsize
+        published_at += b''.join(value.encode()[:width].ljust(width, b'\0') for value, is_valid in zip(dates, valid)
+                                 if is_valid)
+
+    @staticmethod
+    def from_rows(rows, list_naming, chunk_size=1 << 16):
+        """Функция собирает таблицу из строк csv-файла без объектов Vacancy и Salary. Очищенные ячейки
+        копятся по столбцам не больше чем для chunk_size строк и переводятся через append_chunk, поэтому
+        память, кроме самой таблицы, не зависит от размера файла.
+
+        Args:
+            rows (iterable): Строки csv-файла в виде списков.
+            list_naming (list): Название столбцов csv-файла.
+            chunk_size (int): Количество строк в одной части.
+
+        Returns:
+            VacancyTable: Таблица вакансий, такая же, как from_vacancies(DataSet.rows_to_vacancies(rows, ...)).
+        """
+        indexes = [(list_naming.index(column), column in intern_columns) for column in report_columns]
+        columns, published_at, dictionaries = VacancyTable.empty_buffers()
+        rejects = RejectReport()
+        chunk = [[] for _ in report_columns]
+        rows_in = rows_rejected = 0
+        for line in rows:
+            rows_in += 1
+            if len(line) != len(list_naming) or '' in line:
+                rows_rejected += 1
+                continue
+            for column_values, (i, is_interned) in zip(chunk, indexes):
+                value = DataSet.cleaner_string(line[i])
+                column_values.append(sys.intern(value) if is_interned else value)
+            if len(chunk[0]) == chunk_size:
+                VacancyTable.append_chunk(columns, published_at, dictionaries, chunk, rejects)
+                chunk = [[] for _ in report_columns]
+        if chunk[0]:
+            VacancyTable.append_chunk(columns, published_at, dictionaries, chunk, rejects)
+        profiler.count('csv_filter', rows_in, rows_rejected, rows_in - rows_rejected)
+        return VacancyTable.from_buffers(columns, published_at, dictionaries, rejects)
+
+    @staticmethod
+    def range_table(args):
+        """Функция собирает таблицу по одному диапазону байтов csv-файла. Запускается в отдельном процессе.
+
+        Args:
+            args (tuple): Название файла, название столбцов, начало и конец диапазона, курсы по месяцам
+                (Salary.monthly_rates) и включены ли замеры.
+
+        Returns:
+            tuple: Таблица вакансий диапазона и замеры этапов задачи для profiler.merge.
+        """
+        file_name, list_naming, start, end, monthly_rates, profile = args
+        Salary.set_monthly_rates(monthly_rates)
+        with profiler.task(profile) as stages:
+            table = VacancyTable.from_rows(csv.reader(DataSet.range_lines(file_name, start, end)), list_naming)
+        return table, stages
+
+    @staticmethod
+    def concatenate(tables):
+        """Функция склеивает таблицы частей файла по порядку, перенумеровывая строковые столбцы по общим
+        спискам уникальных значений.
+
+        Args:
+            tables (list): Таблицы частей файла по порядку.
+
+        Returns:
+            VacancyTable: Общая таблица.
+        """
+        dictionaries = {'currency_ids': {}, 'area_ids': {}, 'name_ids': {}}
+        parts = {column: [] for column in VacancyTable.column_types}
+        rejects = RejectReport()
+        for table in tables:
+            for column, values in (('currency_ids', table.currencies), ('area_ids', table.areas),
+                                   ('name_ids', table.names)):
+                ids = dictionaries[column]
+                mapping = np.array([ids.setdefault(value, len(ids)) for value in values], dtype=np.int64)
+                parts[column].append(mapping[table.columns[column]] if len(mapping) else table.columns[column])
+            for column in ('years', 'salaries_rub', 'salary_from', 'salary_to', 'published_at'):
+                parts[column].append(table.columns[column])
+            rejects.merge(table.rejects)
+        VacancyTable.check_dictionaries(dictionaries)
+        columns = {column: np.concatenate(values).astype(VacancyTable.column_types[column]) if values else
+                   np.empty(0, dtype=VacancyTable.column_types[column]) for column, values in parts.items()}
+        return VacancyTable(columns, list(dictionaries['currency_ids']), list(dictionaries['area_ids']),
+                            list(dictionaries['name_ids']), rejects)
+
+    @staticmethod
+    def from_csv(file_name, workers=1, min_range=1 << 20):
+        """Функция читает csv-файл (можно сжатый) и собирает таблицу через from_rows. Несжатый файл
+        можно разделить на диапазоны байтов (DataSet.byte_ranges) и собрать их в отдельных процессах.
+
+        Args:
+            file_name (str): Название csv-файла.
+            workers (int or None): Количество процессов. None - по количеству ядер.
+            min_range (int): Минимальный размер одного диапазона в байтах.
+
+        Returns:
+            VacancyTable: Таблица вакансий.
+        """
+        if workers != 1 and not is_compressed(file_name):
+            workers = workers or os.cpu_count() or 1
+            list_naming, ranges = DataSet.byte_ranges(file_name, workers, min_range)
+            tasks = [(file_name, list_naming, start, end, Salary.monthly_rates, profiler.enabled)
+                     for start, end in ranges]
+            if len(tasks) > 1:
+                tables = []
+                with cf.ProcessPoolExecutor(min(workers, len(tasks))) as executor:
+                    for table, stages in executor.map(VacancyTable.range_table, tasks):
+                        tables.append(table)
+                        profiler.merge(stages)
+                return VacancyTable.concatenate(tables)
+        with open_file(file_name, encoding="utf_8_sig") as file:
+            text = csv.reader(file)
+            list_naming = next(text, None)
+            if list_naming is None:
+                print("Пустой файл")
+                exit()
+            return VacancyTable.from_rows(text, list_naming)
+
+    def __len__(self):
+        return len(self.columns['years'])
+
+    def __getitem__(self, i):
+        """Функция возвращает вакансию по номеру строки, чтобы таблицей можно было пользоваться как списком.
+
+        Args:
+            i (int): Номер строки.
+
+        Returns:
+            Vacancy: Вакансия, собранная из столбцов.
+        """
+        columns = self.columns
+        return Vacancy(self.names[columns['name_ids'][i]],
+                       Salary(float(columns['salary_from'][i]), float(columns['salary_to'][i]),
+                              self.currencies[columns['currency_ids'][i]], columns['published_at'][i][:7].decode()),
+                       self.areas[columns['area_ids'][i]], columns['published_at'][i].decode())
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def salaries_rub(self):
+        """ndarray: Средние зарплаты в рублях."""
+        return self.columns['salaries_rub']
+
+    @property
+    def years(self):
+        """ndarray: Годы публикации вакансий."""
+        return self.columns['years']
+
+    @property
+    def area_ids(self):
+        """ndarray: Номера городов в списке areas."""
+        return self.columns['area_ids']
+
+    def get_statistic(self, vac_name, quantiles=None):
+        """Функция считает статистику по столбцам таблицы через np.bincount.
+
+        Args:
+            vac_name (str or list): Профессия или список профессий.
+            quantiles (float or None): Допустимая ошибка квантилей. None - квантили не считаются.
+
+        Returns:
+            Statistic: Статистика по всем вакансиям таблицы, в rejects - вакансии, пропущенные при сборке таблицы.
+        """
+        statistic = Statistic.from_columns(vac_name, self.years, self.salaries_rub, self.area_ids, self.areas,
+                                           self.columns['name_ids'], self.names, quantiles)
+        statistic.rejects.merge(self.rejects)
+        return statistic
+
+
+class VacancyCache:
+    """Класс хранит таблицу вакансий csv-файла в бинарных столбцах фиксированной ширины рядом с файлом
+    (папка file_name.cache) и открывает их через numpy.memmap. Кэш пересобирается, только если изменились
+    размер, время изменения или хэш содержимого csv-файла. Каждая сборка пишет столбцы в новую папку версии,
+    а meta.json заменяется атомарно, поэтому файлы, которые уже отображены в память, никогда не обрезаются.
+    """
+    @staticmethod
+    def file_key(file_name, sample_size=1 << 16, samples=16):
+        """Функция вычисляет ключ csv-файла: размер, время изменения и хэш содержимого (sampled_digest).
+
+        Args:
+            file_name (str): Название csv-файла.
+            sample_size (int): Размер хэшируемого блока в байтах.
+            samples (int): Количество блоков из середины файла.
+
+        Returns:
+            dict: Размер, время изменения, хэш файла, набор столбцов кэша и курсы валют.
+        """
+        stat = os.stat(file_name)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+                'hash': sampled_digest(file_name, stat.st_size, sample_size, samples),
+                'columns': VacancyTable.column_types, 'rates': currency_to_rub,
+                'monthly_rates': Salary.monthly_rates_key}
+
+    @staticmethod
+    def load(file_name, workers=1):
+        """Функция открывает кэш csv-файла, при необходимости пересобирая его.
+
+        Args:
+            file_name (str): Название csv-файла.
+            workers (int or None): Количество процессов для сборки кэша. None - по количеству ядер.
+
+        Returns:
+            VacancyTable: Таблица вакансий, столбцы которой отображены в память.
+        """
+        folder = file_name + '.cache'
+        key = VacancyCache.file_key(file_name)
+        try:
+            with open(os.path.join(folder, 'meta.json'), encoding='utf_8') as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            meta = None
+        # кэш без отчета об отброшенных значениях собран прежней версией и пересобирается
+        if meta is None or meta['key'] != key or 'rejects' not in meta:
+            meta = VacancyCache.build(file_name, folder, key, workers)
+        columns = {}
+        for column, dtype in VacancyTable.column_types.items():
+            if meta['rows'] == 0:
+                columns[column] = np.empty(0, dtype=dtype)
+            else:
+                columns[column] = np.memmap(os.path.join(folder, meta.get('version', ''), f'{column}.bin'),
+                                            dtype=dtype, mode='r', shape=(meta['rows'],))
+        rejects = RejectReport()
+        for field, count in meta['rejects'].items():
+            rejects.counts[field] = count
+            rejects.examples[field] = [tuple(example) for example in meta['reject_examples'][field]]
+        return VacancyTable(columns, meta['currencies'], meta['areas'], meta['names'], rejects)
+
+    @staticmethod
+    def build(file_name, folder, key, workers=1):
+        """Функция разбирает csv-файл и записывает столбцы кэша в новую папку версии. Файл meta.json
+        со ссылкой на версию заменяется последним, поэтому прерванная сборка не считается действительным
+        кэшем. Папка прошлой версии затем удаляется: таблицы, которые ее отображают, продолжают работать,
+        так как файл только отвязывается от папки, а не обрезается (в Windows занятая папка остается).
+
+        Args:
+            file_name (str): Название csv-файла.
+            folder (str): Папка кэша.
+            key (dict): Ключ csv-файла из file_key.
+            workers (int or None): Количество процессов для разбора файла. None - по количеству ядер.
+
+        Returns:
+            dict: Описание кэша (ключ, количество строк, списки уникальных значений и отброшенные значения).
+        """
+        table = VacancyTable.from_csv(file_name, workers)
+        os.makedirs(folder, exist_ok=True)
+        try:
+            with open(os.path.join(folder, 'meta.json'), encoding='utf_8') as file:
+                old_version = json.load(file).get('version', '')
+        except (OSError, ValueError):
+            old_version = None
+        version = os.path.basename(tempfile.mkdtemp(prefix='columns-', dir=folder))
+        for column, values in table.columns.items():
+            with open(os.path.join(folder, version, f'{column}.bin'), 'wb') as file:
+                values.tofile(file)
+        meta = {'key': key, 'rows': len(table), 'currencies': table.currencies, 'areas': table.areas,
+                'names': table.names, 'version': version, 'rejects': table.rejects.counts,
+                'reject_examples': table.rejects.examples}
+        meta_name = os.path.join(folder, f'meta.json.{version}')
+        with open(meta_name, 'w', encoding='utf_8') as file:
+            json.dump(meta, file, ensure_ascii=False)
+        os.replace(meta_name, os.path.join(folder, 'meta.json'))
+        if old_version:
+            shutil.rmtree(os.path.join(folder, old_version), ignore_errors=True)
+        elif old_version == '':
+            for column in VacancyTable.column_types:
+                try:
+                    os.remove(os.path.join(folder, f'{column}.bin'))
+                except OSError:
+                    pass
+        return meta
+
+
+class VacancyCube:
+    """Класс хранит заранее посчитанные сумму, количество, минимум и максимум зарплат в разрезе
+    (месяц, город, валюта, профессии). Профессии ячейки - те из professions куба, которые NameIndex нашел
+    в названии вакансии, поэтому ячеек столько, сколько сочетаний месяца, города, валюты и найденных
+    профессий, а не названий вакансий. Статистика Interface.printing_data для этих профессий, а также ряды
+    по месяцам и кварталам считаются по кубу без чтения csv-файла. Куб помнит, до какого байта прочитан
+    файл, и отпечаток прочитанной части: при sync дочитываются только новые строки, а если файл обрезан или
+    переписан, куб собирается заново.
+
+    Attributes:
+        professions (list): Профессии, по которым делится куб.
+        cells (dict): Словарь (месяц, город, валюта, найденные профессии) - [сумма, количество, минимум, максимум].
+        list_naming (list or None): Название столбцов csv-файла.
+        offset (int): Сколько байтов csv-файла уже учтено.
+        fingerprint (str or None): Отпечаток первых offset байтов csv-файла.
+        rejects (RejectReport): Некорректные значения строк, пропущенных при sync.
+    """
+    def __init__(self, professions=(), cells=None, list_naming=None, offset=0, fingerprint=None):
+        """Инициализирует куб.
+
+        Args:
+            professions (list): Профессии, по которым делится куб.
+            cells (dict or None): Ячейки куба.
+            list_naming (list or None): Название столбцов csv-файла.
+            offset (int): Сколько байтов csv-файла уже учтено.
+            fingerprint (str or None): Отпечаток первых offset байтов csv-файла.
+        """
+        self.index = NameIndex([professions] if isinstance(professions, str) else professions)
+        self.professions = self.index.professions
+        self.cells = {} if cells is None else cells
+        self.list_naming = list_naming
+        self.offset = offset
+        self.fingerprint = fingerprint
+        self.rejects = RejectReport()
+
+    @staticmethod
+    def prefix_fingerprint(file_name, size, sample_size=1 << 16, samples=16):
+        """Функция вычисляет отпечаток первых size байтов файла: длину и sampled_digest этой части, как
+        VacancyCache.file_key для всего файла.
+
+        Args:
+            file_name (str): Название csv-файла.
+            size (int): Длина части в байтах.
+            sample_size (int): Размер хэшируемого блока в байтах.
+            samples (int): Количество блоков из середины.
+
+        Returns:
+            str: Отпечаток.
+        """
+        return f'{size}:{sampled_digest(file_name, size, sample_size, samples)}'
+
+    def update(self, vacancies, rejects=None):
+        """Функция добавляет вакансии в ячейки куба. Сначала все вакансии сворачиваются в отдельные ячейки
+        и только потом добавляются в куб, поэтому исключение на некорректной дате не оставляет куб
+        учтенным наполовину.
+
+        Args:
+            vacancies (iterable): Вакансии.
+            rejects (RejectReport or None): Отчет, в который записываются вакансии с некорректной датой вместо
+                исключения. None - исключение как у strptime.
+        """
+        cells = {}
+        for vacancy in vacancies:
+            parsed = FieldParser.year_month(vacancy.published_at, rejects)
+            if parsed is None:
+                continue
+            salary = vacancy.salary.get_salary_rubles()
+            matched = tuple(self.professions[i] for i in self.index.match(vacancy.name))
+            key = (parsed[1], vacancy.area_name, vacancy.salary.salary_currency, matched)
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [salary, 1, salary, salary]
+            else:
+                cell[0] += salary
+                cell[1] += 1
+                cell[2] = min(cell[2], salary)
+                cell[3] = max(cell[3], salary)
+        for key, (total, count, low, high) in cells.items():
+            cell = self.cells.get(key)
+            if cell is None:
+                self.cells[key] = [total, count, low, high]
+            else:
+                cell[0] += total
+                cell[1] += count
+                cell[2] = min(cell[2], low)
+                cell[3] = max(cell[3], high)
+
+    def sync(self, file_name, rejects=None):
+        """Функция дочитывает из csv-файла строки, появившиеся после прошлой синхронизации. Последняя строка
+        без перевода строки считается недописанной и откладывается до следующего раза. Если файл стал короче
+        учтенной части или ее отпечаток изменился, ячейки сбрасываются и файл читается с начала.
+
+        Args:
+            file_name (str): Название csv-файла, в который вакансии только дописываются.
+            rejects (RejectReport or None): Отчет для строк с некорректными значениями. None - rejects куба.
+
+        Returns:
+            VacancyCube: Обновленный куб.
+        """
+        if is_compressed(file_name):
+            raise ValueError('Куб дочитывает файл по смещению в байтах, сжатый файл нужно распаковать')
+        if rejects is None:
+            rejects = self.rejects
+        size = os.path.getsize(file_name)
+        if self.offset and (size < self.offset or
+                            VacancyCube.prefix_fingerprint(file_name, self.offset) != self.fingerprint):
+            self.cells, self.list_naming, self.offset, self.fingerprint = {}, None, 0, None
+        with open(file_name, 'rb') as file:
+            if self.offset == 0:
+                self.list_naming = next(csv.reader([file.readline().decode('utf_8_sig')]), None)
+                if self.list_naming is None:
+                    return self
+                self.offset = file.tell()
+            end = size
+            while end > self.offset:
+                file.seek(max(self.offset, end - (1 << 16)))
+                block = file.read(end - file.tell())
+                newline = block.rfind(b'\n')
+                if newline != -1:
+                    end -= len(block) - newline - 1
+                    break
+                end -= len(block)
+        if end > self.offset:
+            rows = csv.reader(DataSet.range_lines(file_name, self.offset, end))
+            self.update(DataSet.rows_to_vacancies(rows, self.list_naming, rejects=rejects), rejects)
+        self.offset = end
+        self.fingerprint = VacancyCube.prefix_fingerprint(file_name, end)
+        return self
+
+    def save(self, cube_name):
+        """Функция сохраняет куб в json-файл.
+
+        Args:
+            cube_name (str): Название json-файла.
+        """
+        with open(cube_name + '.tmp', 'w', encoding='utf_8') as file:
+            json.dump({'professions': self.professions, 'list_naming': self.list_naming, 'offset': self.offset,
+                       'fingerprint': self.fingerprint,
+                       'cells': [list(key[:3]) + [list(key[3])] + cell for key, cell in self.cells.items()]},
+                      file, ensure_ascii=False)
+        os.replace(cube_name + '.tmp', cube_name)
+
+    @staticmethod
+    def load(cube_name):
+        """Функция загружает куб из json-файла.
+
+        Args:
+            cube_name (str): Название json-файла.
+
+        Returns:
+            VacancyCube: Куб вакансий.
+        """
+        with open(cube_name, encoding='utf_8') as file:
+            data = json.load(file)
+        return VacancyCube(data['professions'], {tuple(row[:3]) + (tuple(row[3]),): row[4:] for row in data['cells']},
+                           data['list_naming'], data['offset'], data['fingerprint'])
+
+    def check_professions(self, vac_names):
+        """Функция проверяет, что по профессиям можно считать статистику из куба.
+
+        Args:
+            vac_names (list): Профессии.
+        """
+        unknown = [vac_name for vac_name in vac_names if vac_name not in self.professions]
+        if unknown:
+            raise ValueError(f'Куб собран без профессий: {", ".join(unknown)}')
+
+    def get_statistic(self, vac_names):
+        """Функция сворачивает куб в статистику по годам и городам.
+
+        Args:
+            vac_names (str or list): Профессия или список профессий из professions куба.
+
+        Returns:
+            Statistic: Статистика, из которой get_dicts получает шесть словарей.
+        """
+        statistic = Statistic(vac_names)
+        self.check_professions(statistic.vac_names)
+        for (month, area_name, currency, matched), (total, count, low, high) in self.cells.items():
+            year = int(month[:4])
+            statistic.count += count
+            Statistic.add(statistic.years, year, total, count)
+            for vac_name in matched:
+                if vac_name in statistic.vac_years:
+                    Statistic.add(statistic.vac_years[vac_name], year, total, count)
+            Statistic.add(statistic.cities, area_name, total, count)
+        return statistic
+
+    def series(self, period='month', vac_name=None):
+        """Функция считает средние зарплаты, количество вакансий, минимум и максимум по месяцам, кварталам
+        или годам.
+
+        Args:
+            period (str): month, quarter или year.
+            vac_name (str or None): Профессия из professions куба. None - все вакансии.
+
+        Returns:
+            dict: Словарь период - (средняя зарплата, количество, минимум, максимум).
+        """
+        if vac_name is not None:
+            self.check_professions([vac_name])
+        periods = {}
+        for (month, area_name, currency, matched), (total, count, low, high) in self.cells.items():
+            if vac_name is not None and vac_name not in matched:
+                continue
+            if period == 'year':
+                key = month[:4]
+            elif period == 'quarter':
+                key = f'{month[:4]}-Q{(int(month[5:7]) - 1) // 3 + 1}'
+            else:
+                key = month
+            cell = periods.get(key)
+            if cell is None:
+                periods[key] = [total, count, low, high]
+            else:
+                cell[0] += total
+                cell[1] += count
+                cell[2] = min(cell[2], low)
+                cell[3] = max(cell[3], high)
+        return {key: (int(total / count), count, low, high) for key, (total, count, low, high) in sorted(periods.items())}
+
+
+if __name__ == '__main__':
+    profiler.enable_from_argv(sys.argv)
+    rates_name = Interface.get_option('--rates', 'currency_rates.sqlite')
+    if os.path.exists(rates_name):
+        Salary.use_currency_rates(rates_name)
+    options = Interface()
+    sample = Interface.get_option('--sample')
+    quantiles = Interface.get_option('--quantiles')
+    result = DataSet.test_data(options.parameter, options.parameter[2], workers=None, cache=True,
+                               sample=int(sample) if sample else None, seek='--seek' in sys.argv,
+                               quantiles=float(quantiles) if quantiles else None)
+    with profiler.stage('report'):
+        Report.render(result, options.parameter[1] + (' (приблизительно, по выборке)' if sample else ''))
@@ -0,0 +1,398 @@
+import os
+import json
+import argparse
+import tempfile
+import warnings
+import multiprocessing as mp
+import concurrent.futures as cf
+from unittest import TestCase
+import pandas as pd
+from profiler import profiler
+from compressed import open_file, codecs
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+parquet_codecs = {None: 'snappy', '.gz': 'gzip', '.zst': 'zstd'}
+column_dtypes = {'name': 'string', 'salary': 'float64', 'salary_from': 'float64', 'salary_to': 'float64',
+                 'salary_currency': 'category', 'area_name': 'category', 'published_at': 'string'}
+
+
+class YearPartitioner:
+    """Класс за один проход раскладывает большой csv-файл с вакансиями по файлам-разделам по годам. Файл
+    читается порциями по chunksize строк с заданными типами столбцов, год берется срезом строки published_at,
+    и каждая порция дописывается в разделы своих лет, поэтому память не зависит от размера файла. Рядом
+    с разделами сохраняется manifest.json с количеством строк и первой и последней датой каждого года,
+    количеством пропущенных строк и строк, которые не удалось разобрать. Схема parquet-разделов
+    определяется по первой порции: числовые столбцы хранятся как float64, остальные - как строки, поэтому
+    столбец, пустой в первых порциях, не ломает запись следующих.
+
+    Attributes:
+        folder (str): Папка с разделами.
+        chunksize (int): Количество строк в одной порции.
+        format (str): Формат разделов: parquet (если установлен pyarrow) или csv.
+        dropna (bool): Пропускать строки с пустыми значениями.
+        compression (str or None): Сжатие разделов: .gz, .bz2, .xz, .zst (parquet - только .gz и .zst).
+    """
+    def __init__(self, folder, chunksize=100000, file_format=None, dropna=False, compression=None):
+        """Инициализирует разделитель.
+
+        Args:
+            folder (str): Папка с разделами.
+            chunksize (int): Количество строк в одной порции.
+            file_format (str or None): parquet или csv. None - parquet, если установлен pyarrow.
+            dropna (bool): Пропускать строки с пустыми значениями.
+            compression (str or None): Сжатие разделов: .gz, .bz2, .xz, .zst. None - без сжатия.
+        """
+        if file_format == 'parquet' and pq is None:
+            raise ValueError('Для формата parquet нужен pyarrow')
+        self.folder = folder
+        self.chunksize = chunksize
+        self.format = file_format or ('parquet' if pq is not None else 'csv')
+        self.dropna = dropna
+        if compression not in (None,) + (codecs if self.format == 'csv' else tuple(parquet_codecs)):
+            raise ValueError(f'Неподдерживаемое сжатие для формата {self.format}: {compression}')
+        self.compression = compression
+
+    def partition_name(self, year):
+        """Функция возвращает путь к разделу года.
+
+        Args:
+            year (str): Год.
+
+        Returns:
+            str: Путь к файлу раздела.
+        """
+        extension = self.compression if self.format == 'csv' and self.compression else ''
+        return os.path.join(self.folder, f'file_csv_{year}.{self.format}{extension}')
+
+    @staticmethod
+    def read_chunks(file, chunksize):
+        """Функция читает csv-файл порциями с заданными типами известных столбцов. Строки с лишними полями
+        пропускаются с предупреждением ParserWarning (кроме первой строки порции: ее C-парсер pandas молча
+        обрезает до количества столбцов).
+
+        Args:
+            file (file): Двоичный файловый объект csv-файла.
+            chunksize (int): Количество строк в одной порции.
+
+        Returns:
+            TextFileReader: Итератор по порциям-DataFrame.
+        """
+        return pd.read_csv(file, chunksize=chunksize, dtype=column_dtypes, on_bad_lines='warn')
+
+    @staticmethod
+    def parquet_schema(chunk):
+        """Функция определяет схему parquet-разделов по первой порции. Известные числовые столбцы и
+        неизвестные числовые столбцы со значениями хранятся как float64, остальные (строки, категории и
+        пустые столбцы) - как строки.
+
+        Args:
+            chunk (DataFrame): Первая порция файла.
+
+        Returns:
+            Schema: Схема pyarrow.
+        """
+        fields = []
+        for column in chunk.columns:
+            dtype = chunk[column].dtype
+            numeric = column_dtypes.get(column) == 'float64' or column not in column_dtypes and \
+                pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype) and \
+                chunk[column].notna().any()
+            fields.append(pa.field(column, pa.float64() if numeric else pa.string()))
+        return pa.schema(fields)
+
+    def partition(self, file_name):
+        """Функция раскладывает файл по годам и записывает manifest.json.
+
+        Args:
+            file_name (str): Название csv-файла, можно сжатого (.gz, .bz2, .xz, .zst).
+
+        Returns:
+            dict: Манифест: формат, столбцы и словарь год - {файл, строки, первая и последняя дата}.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        years, writers, columns, schema, skipped = {}, {}, None, None, 0
+        with profiler.stage('partition'), open_file(file_name, 'rb') as file, \
+                warnings.catch_warnings(record=True) as bad_lines:
+            warnings.simplefilter('always', pd.errors.ParserWarning)
+            try:
+                for chunk in YearPartitioner.read_chunks(file, self.chunksize):
+                    if schema is None and self.format == 'parquet':
+                        schema = YearPartitioner.parquet_schema(chunk)
+                    if self.dropna:
+                        size = len(chunk)
+                        chunk = chunk.dropna()
+                        skipped += size - len(chunk)
+                    columns = list(chunk.columns)
+                    chunk_years = chunk['published_at'].str[:4]
+                    skipped += int(chunk_years.isna().sum())
+                    for year, part in chunk.groupby(chunk_years, sort=False):
+                        dates = part['published_at']
+                        info = years.get(year)
+                        if info is None:
+                            info = years[year] = {'file': os.path.basename(self.partition_name(year)), 'rows': 0,
+                                                  'min_date': dates.min(), 'max_date': dates.max()}
+                        info['rows'] += len(part)
+                        info['min_date'] = min(info['min_date'], dates.min())
+                        info['max_date'] = max(info['max_date'], dates.max())
+                        self.append(writers, year, part, schema)
+            finally:
+                for writer in writers.values():
+                    writer.close()
+        # Каждое предупреждение ParserWarning перечисляет пропущенные строки порции, по одной на строку текста
+        bad = sum(str(warning.message).count('Skipping line') for warning in bad_lines
+                  if issubclass(warning.category, pd.errors.ParserWarning))
+        manifest = {'source': os.path.basename(file_name), 'format': self.format, 'compression': self.compression,
+                    'columns': columns, 'skipped': skipped, 'bad_lines': bad, 'years': dict(sorted(years.items()))}
+        rows = sum(info['rows'] for info in years.values())
+        profiler.count('partition', rows + skipped + bad, skipped + bad, rows)
+        with open(os.path.join(self.folder, 'manifest.json'), 'w', encoding='utf_8') as file:
+            json.dump(manifest, file, ensure_ascii=False, indent=1)
+        return manifest
+
+    def append(self, writers, year, part, schema=None):
+        """Функция дописывает порцию в раздел года. Раздел открывается (и перезаписывается) при первой
+        порции года и остается открытым до конца разделения.
+
+        Args:
+            writers (dict): Открытые разделы по годам.
+            year (str): Год.
+            part (DataFrame): Строки порции за этот год.
+            schema (Schema or None): Схема parquet-разделов (см. parquet_schema).
+        """
+        if self.format == 'csv':
+            is_new = year not in writers
+            if is_new:
+                writers[year] = open_file(self.partition_name(year), 'w', encoding='utf_8', newline='')
+            part.to_csv(writers[year], index=False, header=is_new)
+            return
+        table = pa.Table.from_pandas(part.astype({field.name: 'string' for field in schema
+                                                  if field.type == pa.string()}),
+                                     schema=schema, preserve_index=False)
+        if year not in writers:
+            writers[year] = pq.ParquetWriter(self.partition_name(year), schema,
+                                             compression=parquet_codecs[self.compression])
+        writers[year].write_table(table)
+
+    @staticmethod
+    def load_manifest(folder):
+        """Функция читает манифест папки с разделами.
+
+        Args:
+            folder (str): Папка с разделами.
+
+        Returns:
+            dict: Манифест.
+        """
+        with open(os.path.join(folder, 'manifest.json'), encoding='utf_8') as file:
+            return json.load(file)
+
+    @staticmethod
+    def read_partition(file_name, columns=None):
+        """Функция читает раздел года по расширению файла.
+
+        Args:
+            file_name (str): Путь к разделу, csv-раздел может быть сжат.
+            columns (list or None): Нужные столбцы. None - все.
+
+        Returns:
+            DataFrame: Вакансии за год.
+        """
+        if file_name.endswith('.parquet'):
+            return pd.read_parquet(file_name, columns=columns)
+        dtypes = {column: dtype for column, dtype in column_dtypes.items() if columns is None or column in columns}
+        with open_file(file_name, 'rb') as file:
+            return pd.read_csv(file, usecols=columns, dtype=dtypes)
+
+
+class PartitionScheduler:
+    """Класс запускает обработку разделов в процессах. Задачи отправляются от самого большого файла к самому
+    маленькому, чтобы долгий раздел не оставался последним, результаты принимаются по мере готовности и
+    сразу передаются в функцию объединения. Пул создается один раз и используется во всех запусках.
+
+    Attributes:
+        backend (str): Способ обработки: serial, pool (multiprocessing.Pool) или futures (ProcessPoolExecutor).
+        workers (int): Количество процессов.
+    """
+    backends = ('serial', 'pool', 'futures')
+
+    def __init__(self, backend='futures', workers=None):
+        """Инициализирует планировщик.
+
+        Args:
+            backend (str): Способ обработки: serial, pool или futures.
+            workers (int or None): Количество процессов. None - по количеству доступных ядер.
+        """
+        if backend not in PartitionScheduler.backends:
+            raise ValueError(f'Неизвестный способ обработки: {backend}')
+        self.backend = backend
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+        self.workers = workers or cores
+        self.executor = None
+
+    @staticmethod
+    def order(tasks):
+        """Функция сортирует задачи по убыванию размера файла раздела.
+
+        Args:
+            tasks (list): Задачи - словари с ключом file.
+
+        Returns:
+            list: Задачи от самой большой к самой маленькой.
+        """
+        return sorted(tasks, key=lambda task: os.path.getsize(task['file']), reverse=True)
+
+    def get_executor(self):
+        """Функция возвращает пул процессов, создавая его при первом запуске.
+
+        Returns:
+            Pool or ProcessPoolExecutor: Пул процессов.
+        """
+        if self.executor is None:
+            self.executor = mp.Pool(self.workers) if self.backend == 'pool' else \
+                cf.ProcessPoolExecutor(self.workers)
+        return self.executor
+
+    def run(self, function, tasks, merge):
+        """Функция обрабатывает разделы и объединяет результаты в порядке готовности.
+
+        Args:
+            function (function): Функция обработки одной задачи, возвращает небольшой кортеж.
+            tasks (list): Задачи - словари с ключом file.
+            merge (function): Функция, принимающая результат одной задачи.
+
+        Returns:
+            int: Количество обработанных задач.
+        """
+        tasks = PartitionScheduler.order(tasks)
+        if self.backend == 'serial':
+            results = map(function, tasks)
+        elif self.backend == 'pool':
+            results = self.get_executor().imap_unordered(function, tasks)
+        else:
+            executor = self.get_executor()
+            results = (future.result() for future in cf.as_completed([executor.submit(function, task)
+                                                                      for task in tasks]))
+        for result in results:
+            merge(result)
+        return len(tasks)
+
+    def close(self):
+        """Функция останавливает пул процессов."""
+        if self.executor is None:
+            return
+        if self.backend == 'pool':
+            self.executor.close()
+            self.executor.join()
+        else:
+            self.executor.shutdown()
+        self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def file_size(task):
+    """Функция возвращает название и размер файла задачи (для проверки планировщика в процессах).
+
+    Args:
+        task (dict): Задача с ключом file.
+
+    Returns:
+        tuple: Название и размер файла.
+    """
+    return os.path.basename(task['file']), os.path.getsize(task['file'])
+
+
+class Tests(TestCase):
+    def test_partition_csv(self):
+        with tempfile.TemporaryDirectory() as folder:
+            file_name = os.path.join(folder, 'vacancies.csv')
+            pd.DataFrame({'name': ['a', 'b', 'c', 'd', 'e'], 'salary_from': [1, 2, None, 4, 5],
+                          'salary_to': [1, 2, 3, 4, 5], 'salary_currency': ['RUR'] * 5,
+                          'area_name': ['Москва', 'Казань', 'Москва', 'Омск', 'Москва'],
+                          'published_at': ['2007-12-03T17:40:09+0300', '2008-01-02T10:00:00+0300',
+                                           '2007-01-05T11:00:00+0300', '2007-06-01T00:00:00+0300', None]}
+                         ).to_csv(file_name, index=False)
+            with open(file_name, 'a', encoding='utf_8') as file:
+                file.write('g,1,1,RUR,Омск,2007-02-01T00:00:00+0300,лишнее\n')
+                file.write('f,1,1,RUR,Омск,2007-02-01T00:00:00+0300\n')
+                file.write('h,1,1,RUR,Омск,2009-02-01T00:00:00+0300\n')
+            partitioner = YearPartitioner(os.path.join(folder, 'parts'), chunksize=2, file_format='csv')
+            manifest = partitioner.partition(file_name)
+            self.assertEqual((manifest['skipped'], manifest['bad_lines']), (1, 1))
+            self.assertEqual(manifest['years']['2007'], {'file': 'file_csv_2007.csv', 'rows': 4,
+                                                         'min_date': '2007-01-05T11:00:00+0300',
+                                                         'max_date': '2007-12-03T17:40:09+0300'})
+            self.assertEqual(YearPartitioner.load_manifest(partitioner.folder), manifest)
+            part = YearPartitioner.read_partition(partitioner.partition_name('2007'))
+            self.assertEqual(part['name'].tolist(), ['a', 'c', 'd', 'f'])
+            self.assertEqual(YearPartitioner(partitioner.folder, file_format='csv', dropna=True)
+                             .partition(file_name)['years']['2007']['rows'], 3)
+            with open(file_name, 'rb') as source, open_file(file_name + '.xz', 'wb') as target:
+                target.write(source.read())
+            partitioner = YearPartitioner(os.path.join(folder, 'xz'), chunksize=2, file_format='csv', compression='.gz')
+            self.assertEqual(partitioner.partition(file_name + '.xz')['years']['2007']['file'], 'file_csv_2007.csv.gz')
+            self.assertEqual(YearPartitioner.read_partition(partitioner.partition_name('2007'))['name'].tolist(),
+                             ['a', 'c', 'd', 'f'])
+
+    def test_partition_parquet(self):
+        if pq is None:
+            self.skipTest('pyarrow не установлен')
+        with tempfile.TemporaryDirectory() as folder:
+            file_name = os.path.join(folder, 'vacancies.csv')
+            pd.DataFrame({'name': list('abcdef'), 'key_skills': [None, None, 'Python', None, 'SQL', None],
+                          'experience': [None, None, None, None, 'нет', None], 'salary_from': [1, 2, 3, 4, 5, 6],
+                          'salary_currency': ['RUR'] * 6, 'area_name': ['Москва'] * 6,
+                          'published_at': ['2007-01-01T00:00:00+0300'] * 6}).to_csv(file_name, index=False)
+            with open(file_name, 'a', encoding='utf_8') as file:
+                file.write('g,Git,,7,RUR,Омск,2008-01-01T00:00:00+0300\n')
+                file.write('h,Git,,8,RUR,Омск,2008-01-01T00:00:00+0300,лишнее\n')
+                file.write('i,Git,,9,RUR,Омск,2008-01-01T00:00:00+0300\n')
+            partitioner = YearPartitioner(os.path.join(folder, 'parts'), chunksize=2, file_format='parquet')
+            manifest = partitioner.partition(file_name)
+            self.assertEqual((manifest['skipped'], manifest['bad_lines']), (0, 1))
+            self.assertEqual(manifest['years']['2007']['file'], 'file_csv_2007.parquet')
+            part = YearPartitioner.read_partition(partitioner.partition_name('2007'))
+            self.assertEqual(part['key_skills'].dropna().tolist(), ['Python', 'SQL'])
+            self.assertEqual(part['experience'].dropna().tolist(), ['нет'])
+            self.assertEqual(part['salary_from'].tolist(), [1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+            self.assertEqual(YearPartitioner.read_partition(partitioner.partition_name('2008'))['name'].tolist(),
+                             ['g', 'i'])
+
+    def test_scheduler_backends(self):
+        with tempfile.TemporaryDirectory() as folder:
+            tasks = []
+            for size in (10, 30, 20):
+                tasks.append({'file': os.path.join(folder, f'{size}.csv')})
+                with open(tasks[-1]['file'], 'w') as file:
+                    file.write('x' * size)
+            self.assertEqual([file_size(task)[1] for task in PartitionScheduler.order(tasks)], [30, 20, 10])
+            for backend in PartitionScheduler.backends:
+                with PartitionScheduler(backend, workers=2) as scheduler:
+                    for _ in range(2):
+                        results = []
+                        self.assertEqual(scheduler.run(file_size, tasks, results.append), 3)
+                        self.assertEqual(sorted(results), [('10.csv', 10), ('20.csv', 20), ('30.csv', 30)])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Разделение csv-файла с вакансиями по годам')
+    parser.add_argument('file', help='csv-файл с вакансиями')
+    parser.add_argument('folder', help='папка для разделов')
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--format', choices=('parquet', 'csv'), default=None)
+    parser.add_argument('--dropna', action='store_true', help='пропускать строки с пустыми значениями')
+    parser.add_argument('--compression', choices=codecs, default=None, help='сжатие разделов')
+    args = parser.parse_args()
+    result = YearPartitioner(args.folder, args.chunksize, args.format, args.dropna,
+                             args.compression).partition(args.file)
+    for year, info in result['years'].items():
+        print(year, info['rows'], info['min_date'], info['max_date'])
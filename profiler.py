@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import atexit
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+from unittest import TestCase
+import tempfile
+
+
+class StageProfiler:
+    """Класс замеряет этапы обработки: время, количество вызовов, строки на входе, отброшенные и на выходе,
+    и пиковую память этапа (через tracemalloc). По умолчанию выключен, и тогда замеры ничего не стоят.
+    Включается флагом --profile или переменной окружения VACANCY_PROFILE с путем к отчету: json или
+    Prometheus-текст (расширение .prom). Переменная VACANCY_CPROFILE включает cProfile для этапов верхнего
+    уровня и задает файл для его статистики. Отчет сохраняется при завершении программы.
+
+    Attributes:
+        enabled (bool): Включены ли замеры.
+        output (str or None): Путь к отчету.
+        cprofile (str or None): Путь к файлу статистики cProfile.
+        stages (dict): Замеры по этапам.
+    """
+    def __init__(self, output=None, cprofile=None):
+        """Инициализирует профилировщик.
+
+        Args:
+            output (str or None): Путь к отчету. None - замеры выключены.
+            cprofile (str or None): Путь к файлу статистики cProfile. None - cProfile не используется.
+        """
+        self.enabled = False
+        self.output = None
+        self.cprofile = None
+        self.profile = None
+        self.stages = {}
+        self.stack = []
+        if output is not None:
+            self.enable(output, cprofile)
+
+    @staticmethod
+    def from_env():
+        """Функция создает профилировщик по переменным окружения VACANCY_PROFILE и VACANCY_CPROFILE.
+
+        Returns:
+            StageProfiler: Профилировщик.
+        """
+        return StageProfiler(os.environ.get('VACANCY_PROFILE') or None, os.environ.get('VACANCY_CPROFILE') or None)
+
+    def enable(self, output='profile.json', cprofile=None):
+        """Функция включает замеры и сохранение отчета при завершении программы.
+
+        Args:
+            output (str): Путь к отчету.
+            cprofile (str or None): Путь к файлу статистики cProfile.
+        """
+        if not self.enabled:
+            atexit.register(self.write)
+        self.enabled = True
+        self.output = output
+        self.cprofile = cprofile
+        if cprofile is not None:
+            self.profile = cProfile.Profile()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def enable_from_argv(self, argv):
+        """Функция включает замеры, если среди аргументов командной строки есть --profile. Путь к отчету
+        берется из VACANCY_PROFILE (по умолчанию profile.json), путь к статистике cProfile - из VACANCY_CPROFILE.
+
+        Args:
+            argv (list): Аргументы командной строки, например sys.argv.
+        """
+        if '--profile' in argv and not self.enabled:
+            self.enable(os.environ.get('VACANCY_PROFILE') or 'profile.json', os.environ.get('VACANCY_CPROFILE'))
+
+    @contextmanager
+    def task(self, enabled):
+        """Функция собирает замеры одной задачи процесса пула отдельно от замеров, которые процесс получил
+        от родителя при fork. Отчет при этом не сохраняется: замеры возвращаются вместе с результатом задачи,
+        и родительский процесс добавляет их через merge.
+
+        Args:
+            enabled (bool): Включены ли замеры в родительском процессе.
+
+        Yields:
+            dict: Замеры задачи, заполненные к выходу из блока.
+        """
+        saved = self.enabled, self.stages, self.stack, self.profile
+        self.enabled, self.stages, self.stack, self.profile = enabled, {}, [], None
+        started = enabled and not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        try:
+            yield self.stages
+        finally:
+            self.enabled, self.stages, self.stack, self.profile = saved
+            if started:
+                tracemalloc.stop()
+
+    def get_stage(self, name):
+        """Функция возвращает замеры этапа, создавая их при необходимости.
+
+        Args:
+            name (str): Название этапа.
+
+        Returns:
+            dict: Замеры этапа.
+        """
+        if name not in self.stages:
+            self.stages[name] = {'calls': 0, 'seconds': 0.0, 'rows_in': 0, 'rows_rejected': 0, 'rows_out': 0,
+                                 'peak_memory': 0}
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name):
+        """Функция замеряет время и пиковую память блока with. Пик вложенного этапа учитывается и во внешнем.
+
+        Args:
+            name (str): Название этапа.
+        """
+        if not self.enabled:
+            yield
+            return
+        if self.stack:
+            self.stack[-1][1] = max(self.stack[-1][1], tracemalloc.get_traced_memory()[1])
+        elif self.profile is not None:
+            self.profile.enable()
+        tracemalloc.reset_peak()
+        self.stack.append([name, 0])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            _, peak = self.stack.pop()
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            stage = self.get_stage(name)
+            stage['calls'] += 1
+            stage['seconds'] += seconds
+            stage['peak_memory'] = max(stage['peak_memory'], peak)
+            if self.stack:
+                self.stack[-1][1] = max(self.stack[-1][1], peak)
+            elif self.profile is not None:
+                self.profile.disable()
+            tracemalloc.reset_peak()
+
+    def count(self, name, rows_in=0, rows_rejected=0, rows_out=0):
+        """Функция добавляет к этапу количество строк.
+
+        Args:
+            name (str): Название этапа.
+            rows_in (int): Строки на входе.
+            rows_rejected (int): Отброшенные строки.
+            rows_out (int): Строки на выходе.
+        """
+        if not self.enabled:
+            return
+        stage = self.get_stage(name)
+        stage['rows_in'] += rows_in
+        stage['rows_rejected'] += rows_rejected
+        stage['rows_out'] += rows_out
+
+    def merge(self, stages):
+        """Функция добавляет замеры этапов, сделанные в другом процессе: время, вызовы и строки складываются,
+        а пиковая память берется наибольшая.
+
+        Args:
+            stages (dict): Замеры по этапам, например stages профилировщика дочернего процесса.
+        """
+        if not self.enabled:
+            return
+        for name, other in stages.items():
+            stage = self.get_stage(name)
+            for key, value in other.items():
+                stage[key] = max(stage[key], value) if key == 'peak_memory' else stage[key] + value
+
+    def to_prometheus(self):
+        """Функция переводит замеры в текстовый формат Prometheus.
+
+        Returns:
+            str: Метрики, по одной строке на этап и показатель.
+
+        >>> profiler = StageProfiler()
+        >>> profiler.stages = {'csv_filter': {'calls': 1, 'rows_in': 3}}
+        >>> print(profiler.to_prometheus(), end='')
+        # TYPE vacancy_stage_calls gauge
+        vacancy_stage_calls{stage="csv_filter"} 1
+        # TYPE vacancy_stage_rows_in gauge
+        vacancy_stage_rows_in{stage="csv_filter"} 3
+        """
+        lines = []
+        for metric in dict.fromkeys(key for stage in self.stages.values() for key in stage):
+            lines.append(f'# TYPE vacancy_stage_{metric} gauge')
+            for name, stage in self.stages.items():
+                if metric in stage:
+                    lines.append(f'vacancy_stage_{metric}{{stage="{name}"}} {stage[metric]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, output=None):
+        """Функция сохраняет отчет о замерах и статистику cProfile.
+
+        Args:
+            output (str or None): Путь к отчету. None - путь, заданный при включении.
+        """
+        output = output or self.output
+        if not self.enabled or output is None:
+            return
+        with open(output, 'w', encoding='utf_8') as file:
+            if output.endswith('.prom'):
+                file.write(self.to_prometheus())
+            else:
+                json.dump(self.stages, file, ensure_ascii=False, indent=1)
+        if self.profile is not None:
+            self.profile.dump_stats(self.cprofile)
+
+
+profiler = StageProfiler.from_env()
+
+
+class Tests(TestCase):
+    def test_stages(self):
+        stage_profiler = StageProfiler('profile.json')
+        self.addCleanup(tracemalloc.stop)
+        self.addCleanup(atexit.unregister, stage_profiler.write)
+        with stage_profiler.stage('report'):
+            with stage_profiler.stage('csv_filter'):
+                data = [0] * 100000
+                stage_profiler.count('csv_filter', 10, 2, 8)
+            del data
+        self.assertEqual(stage_profiler.stages['csv_filter']['rows_rejected'], 2)
+        self.assertGreater(stage_profiler.stages['csv_filter']['peak_memory'], 100000 * 8)
+        self.assertGreaterEqual(stage_profiler.stages['report']['peak_memory'],
+                                stage_profiler.stages['csv_filter']['peak_memory'])
+        self.assertGreaterEqual(stage_profiler.stages['report']['seconds'],
+                                stage_profiler.stages['csv_filter']['seconds'])
+        with tempfile.TemporaryDirectory() as folder:
+            stage_profiler.write(os.path.join(folder, 'profile.prom'))
+            with open(os.path.join(folder, 'profile.prom'), encoding='utf_8') as file:
+                self.assertIn('vacancy_stage_rows_out{stage="csv_filter"} 8', file.read())
+
+    def test_merge(self):
+        stage_profiler = StageProfiler('profile.json')
+        self.addCleanup(tracemalloc.stop)
+        self.addCleanup(atexit.unregister, stage_profiler.write)
+        stage_profiler.merge({'pdf': {'calls': 1, 'seconds': 0.5, 'rows_in': 0, 'rows_rejected': 0, 'rows_out': 0,
+                                      'peak_memory': 10}})
+        stage_profiler.merge({'pdf': {'calls': 1, 'seconds': 0.25, 'rows_in': 0, 'rows_rejected': 0, 'rows_out': 0,
+                                      'peak_memory': 5}})
+        self.assertEqual(stage_profiler.stages['pdf'], {'calls': 2, 'seconds': 0.75, 'rows_in': 0,
+                                                        'rows_rejected': 0, 'rows_out': 0, 'peak_memory': 10})
+
+    def test_task(self):
+        stage_profiler = StageProfiler('profile.json')
+        self.addCleanup(tracemalloc.stop)
+        self.addCleanup(atexit.unregister, stage_profiler.write)
+        stage_profiler.count('csv_filter', 5, 0, 5)
+        with stage_profiler.task(True) as stages:
+            stage_profiler.count('csv_filter', 3, 1, 2)
+        self.assertEqual(stages['csv_filter']['rows_in'], 3)
+        stage_profiler.merge(stages)
+        self.assertEqual(stage_profiler.stages['csv_filter']['rows_in'], 8)
+        stage_profiler.enable_from_argv(['main.py'])
+        with StageProfiler().task(False) as stages:
+            pass
+        self.assertEqual(stages, {})
+
+    def test_disabled(self):
+        stage_profiler = StageProfiler()
+        with stage_profiler.stage('report'):
+            stage_profiler.count('report', 1)
+        self.assertEqual(stage_profiler.stages, {})
@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import threading
+import argparse
+import tempfile
+import csv
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, urlencode
+from urllib.request import urlopen
+from unittest import TestCase
+from main import VacancyCache, report_columns
+
+result_keys = ('salary_by_years', 'vac_salary_by_years', 'vacs_by_years', 'vac_counts_by_years', 'salary_by_cities',
+               'vacs_by_cities')
+methods = ('Вакансии', 'Статистика')
+
+
+class StatisticService:
+    """Класс один раз загружает таблицы вакансий csv-файлов, следит за изменением файлов и отвечает на запросы
+    (файл, профессия, способ вывода) шестью словарями статистики. Ответы хранятся в LRU-кэше с ключом из версии
+    файла и запроса, поэтому после изменения файла старые ответы больше не используются. Новая таблица
+    собирается в новой версии кэша и подменяет старую под блокировкой. Запрос, начатый до подмены, дочитывает
+    старую таблицу: он держит ссылку на нее, а ее файлы кэша не обрезаются, а только отвязываются от папки.
+
+    Attributes:
+        tables (dict): Словарь файл - (версия, таблица вакансий).
+        cache (OrderedDict): Последние ответы по ключу (файл, версия, профессия).
+        maxsize (int): Наибольшее количество ответов в кэше.
+        hits (int): Количество ответов из кэша.
+        misses (int): Количество посчитанных ответов.
+    """
+    def __init__(self, file_names, maxsize=1024):
+        """Инициализирует сервис и загружает файлы.
+
+        Args:
+            file_names (list): Названия csv-файлов.
+            maxsize (int): Наибольшее количество ответов в кэше.
+        """
+        self.tables = {}
+        self.cache = OrderedDict()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.reload_lock = threading.Lock()
+        for file_name in file_names:
+            self.load(file_name)
+
+    @staticmethod
+    def version(file_name):
+        """Функция возвращает версию файла: размер и время изменения.
+
+        Args:
+            file_name (str): Название csv-файла.
+
+        Returns:
+            tuple: Размер и время изменения в наносекундах.
+        """
+        stat = os.stat(file_name)
+        return stat.st_size, stat.st_mtime_ns
+
+    def load(self, file_name):
+        """Функция загружает таблицу вакансий файла через VacancyCache.
+
+        Args:
+            file_name (str): Название csv-файла.
+        """
+        with self.reload_lock:
+            version = StatisticService.version(file_name)
+            table = VacancyCache.load(file_name)
+            with self.lock:
+                self.tables[file_name] = (version, table)
+
+    def refresh(self):
+        """Функция перезагружает файлы, которые изменились с последней загрузки.
+
+        Returns:
+            list: Перезагруженные файлы.
+        """
+        changed = [file_name for file_name, (version, table) in list(self.tables.items())
+                   if os.path.exists(file_name) and StatisticService.version(file_name) != version]
+        for file_name in changed:
+            self.load(file_name)
+        return changed
+
+    def watch(self, interval=5.0):
+        """Функция запускает фоновый поток, который раз в interval секунд проверяет файлы.
+
+        Args:
+            interval (float): Пауза между проверками в секундах.
+
+        Returns:
+            Event: Событие, установка которого останавливает поток.
+        """
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    self.refresh()
+                except (OSError, ValueError) as error:
+                    print(f'Не удалось перезагрузить файлы: {error}', file=sys.stderr)
+
+        threading.Thread(target=loop, daemon=True).start()
+        return stop
+
+    def query(self, file_name, profession, method='Статистика'):
+        """Функция отвечает на запрос статистики, по возможности из кэша.
+
+        Args:
+            file_name (str): Название загруженного csv-файла.
+            profession (str): Профессия.
+            method (str): Способ вывода: Вакансии или Статистика. Ответ от способа не зависит, поэтому способ
+                проверяется, но не входит в ключ кэша.
+
+        Returns:
+            dict: Шесть словарей статистики с ключами result_keys.
+        """
+        if method not in methods:
+            raise ValueError(f'Неизвестный способ вывода: {method}')
+        with self.lock:
+            version, table = self.tables[file_name]
+            key = (file_name, version, profession)
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return self.cache[key]
+        result = dict(zip(result_keys, table.get_statistic(profession).get_dicts()))
+        with self.lock:
+            self.misses += 1
+            self.cache[key] = result
+            if len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+        return result
+
+    def make_handler(self):
+        """Функция создает обработчик HTTP-запросов GET /statistic?file=...&profession=...&method=...
+
+        Returns:
+            type: Класс обработчика для ThreadingHTTPServer.
+        """
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if url.path != '/statistic':
+                    return self.send_json(404, {'error': 'Неизвестный адрес'})
+                try:
+                    result = service.query(query['file'], query.get('profession', ''),
+                                           query.get('method', 'Статистика'))
+                except KeyError:
+                    return self.send_json(404, {'error': 'Файл не загружен'})
+                except ValueError as error:
+                    return self.send_json(400, {'error': str(error)})
+                self.send_json(200, result)
+
+            def send_json(self, status, body):
+                content = json.dumps(body, ensure_ascii=False).encode('utf_8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class Tests(TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.folder.name, 'vacancies.csv')
+        self.write(2)
+        self.service = StatisticService([self.file_name])
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.service.make_handler())
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.folder.cleanup()
+
+    def write(self, rows):
+        with open(self.file_name, 'w', encoding='utf_8_sig', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(report_columns)
+            for i in range(rows):
+                writer.writerow(['Программист', 10000, 20000, 'RUR', 'Москва', f'{2010 + i}-01-01T00:00:00+0300'])
+
+    def get(self, profession):
+        query = urlencode({'file': self.file_name, 'profession': profession})
+        with urlopen(f'http://127.0.0.1:{self.server.server_port}/statistic?{query}') as response:
+            return json.loads(response.read())
+
+    def test_query_is_cached(self):
+        self.assertEqual(self.get('Программист')['vac_counts_by_years'], {'2010': 1, '2011': 1})
+        self.get('Программист')
+        self.service.query(self.file_name, 'Программист', 'Вакансии')
+        self.assertEqual((self.service.hits, self.service.misses), (2, 1))
+
+    def test_changed_file_is_reloaded(self):
+        self.get('Программист')
+        self.write(3)
+        os.utime(self.file_name, ns=(0, os.stat(self.file_name).st_mtime_ns + 10 ** 9))
+        self.assertEqual(self.service.refresh(), [self.file_name])
+        self.assertEqual(self.get('Программист')['vacs_by_years'], {'2010': 1, '2011': 1, '2012': 1})
+
+    def test_old_table_survives_reload(self):
+        self.write(2000)
+        self.service.refresh()
+        version, table = self.service.tables[self.file_name]
+        expected = table.get_statistic('Программист').get_dicts()
+        self.write(1)
+        os.utime(self.file_name, ns=(0, version[1] + 10 ** 9))
+        self.service.refresh()
+        self.assertEqual(table.get_statistic('Программист').get_dicts(), expected)
+        self.assertEqual(self.get('Программист')['vacs_by_years'], {'2010': 1})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Сервис статистики вакансий')
+    parser.add_argument('files', nargs='+', help='csv-файлы с вакансиями')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--interval', type=float, default=5.0, help='пауза между проверками файлов в секундах')
+    args = parser.parse_args()
+    service = StatisticService(args.files)
+    service.watch(args.interval)
+    server = ThreadingHTTPServer((args.host, args.port), service.make_handler())
+    print(f'Сервис статистики запущен на http://{args.host}:{args.port}/statistic', file=sys.stderr)
+    server.serve_forever()
@@ -0,0 +1,45 @@
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class StubServer:
+    """Примесь к TestCase: запускает локальный HTTP-сервер, который отвечает на GET-запросы заданной функцией,
+    и останавливает его после теста.
+    """
+    def start_server(self, respond):
+        """Функция запускает сервер на свободном порту в отдельном потоке.
+
+        Args:
+            respond (function): Функция, принимающая обработчик запроса (BaseHTTPRequestHandler) и отвечающая на него.
+
+        Returns:
+            str: Адрес сервера вида http://127.0.0.1:порт.
+        """
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                respond(self)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f'http://127.0.0.1:{server.server_port}'
+
+    @staticmethod
+    def reply(handler, status, body=b'', content_type=None):
+        """Функция отправляет ответ сервера.
+
+        Args:
+            handler (BaseHTTPRequestHandler): Обработчик запроса.
+            status (int): Код ответа.
+            body (bytes): Тело ответа.
+            content_type (str or None): Заголовок Content-Type. None - без заголовка.
+        """
+        handler.send_response(status)
+        if content_type:
+            handler.send_header('Content-Type', content_type)
+        handler.end_headers()
+        handler.wfile.write(body)